@@ -1,10 +1,17 @@
 import os
+import io
 import wave
 import struct
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 import base64
+import numpy as np
 from pydub import AudioSegment
+from scatter import KeyedScatter
+import carrier_cache
+
+# Sample widths with a native little-endian dtype; 24-bit PCM is handled as bytes
+_SAMPLE_DTYPES = {1: np.uint8, 2: np.dtype('<i2'), 4: np.dtype('<i4')}
 
 class AudioSteganography:
     @staticmethod
@@ -20,60 +27,267 @@ class AudioSteganography:
         return decrypted_msg.decode()
 
     @staticmethod
-    def encode(audio_path: str, message: str, output_path: str, key: str = None) -> None:
+    def encode(audio_path: str, message: str, output_path: str, key: str = None,
+               scatter: bool = False, sample_lsb: bool = False, channel_step: int = 1) -> None:
+        """Encodes a message into WAV LSBs; scatter spreads it in keyed order.
+
+        By default every frame byte carries a bit. With sample_lsb, only the
+        true least significant bit of each sample is used, taking every
+        channel_step-th channel of each frame.
+        """
         if key:
             message = AudioSteganography.encrypt_message(key, message)
 
         # Check if the output file already exists and contains data
         existing_message = ""
         if os.path.exists(output_path):
-            existing_message = AudioSteganography.decode(output_path, key)
+            existing_message = AudioSteganography.decode(output_path, key, scatter, sample_lsb, channel_step)
 
         # Append or replace based on existing data
         if existing_message and existing_message != message:
             message = existing_message + "\n" + message  # Append new data
         # If existing_message == message, replace it (no change needed)
 
-        binary_msg = ''.join(format(ord(c), '08b') for c in message) + '00000000'
-        
+        bits = AudioSteganography._message_bits(message)
+        params, frames = AudioSteganography._load_frames(audio_path, writable=True)
+        slots = AudioSteganography._carrier_slots(params, frames, sample_lsb, channel_step)
+
+        if len(bits) > slots.size:
+            raise ValueError("Message too large for the audio.")
+
+        if scatter:
+            # The scatter header carries the length, so the terminator is left off
+            for pos, chunk in KeyedScatter(key, slots.size).placements(bits[:-8]):
+                idx = AudioSteganography._slot_index(slots, pos)
+                values = slots[idx]
+                slots[idx] = values ^ ((values ^ chunk) & 1)
+        else:
+            AudioSteganography._embed_slots(slots, bits)
+        AudioSteganography._save_frames(params, frames, output_path)
+
+        # WAV output is lossless, so it can seed the cache for a verify-decode
+        cache = carrier_cache.active()
+        if cache is not None:
+            cache.put(output_path, 'audio', params, frames)
+
+    @staticmethod
+    def decode(audio_path: str, key: str = None, scatter: bool = False,
+               sample_lsb: bool = False, channel_step: int = 1) -> str:
+        params, frames = AudioSteganography._load_frames(audio_path)
+        slots = AudioSteganography._carrier_slots(params, frames, sample_lsb, channel_step)
+        if scatter:
+            order = KeyedScatter(key, slots.size)
+            message = order.read_message(
+                lambda pos: (slots[AudioSteganography._slot_index(slots, pos)] & 1).astype(np.uint8))
+            message = message.decode('latin-1')
+        else:
+            message = AudioSteganography._extract_message((slots & 1).reshape(-1).astype(np.uint8))
+        if key:
+            message = AudioSteganography.decrypt_message(key, message)
+        return message
+
+    @staticmethod
+    def encode_stream(src, message, dst, key: str = None, sample_lsb: bool = False,
+                      channel_step: int = 1, chunk_frames: int = 1 << 16) -> None:
+        """Encodes a message read from a WAV stream and writes the WAV to dst as it goes.
+
+        src and dst are binary file objects and need not be seekable (e.g.
+        stdin and stdout); message may be a string or a readable stream.
+        Frames are processed chunk_frames at a time, and the output header
+        is written up front from the input's frame count, so it never has to
+        be patched. There is no existing output to append to.
+        """
+        message = AudioSteganography._read_payload(message)
+        if key:
+            message = AudioSteganography.encrypt_message(key, message)
+        bits = AudioSteganography._message_bits(message)
+
+        with wave.open(src, 'rb') as audio:
+            params = audio.getparams()
+            if sample_lsb:
+                n_slots = params.nframes * len(range(0, params.nchannels, channel_step))
+            else:
+                n_slots = params.nframes * params.sampwidth * params.nchannels
+            if len(bits) > n_slots:
+                raise ValueError("Message too large for the audio.")
+
+            with wave.open(dst, 'wb') as encoded_audio:
+                encoded_audio.setparams(params)
+                offset = 0
+                while True:
+                    chunk = audio.readframes(chunk_frames)
+                    if not chunk:
+                        break
+                    if offset < len(bits):
+                        frames = np.frombuffer(chunk, dtype=np.uint8).copy()
+                        slots = AudioSteganography._carrier_slots(params, frames, sample_lsb, channel_step)
+                        lead = bits[offset:offset + slots.size]
+                        AudioSteganography._embed_slots(slots, lead)
+                        offset += len(lead)
+                        chunk = frames.tobytes()
+                    # writeframes would seek back to patch the header after every chunk
+                    encoded_audio.writeframesraw(chunk)
+                    dst.flush()
+
+    @staticmethod
+    def decode_stream(src, key: str = None, sample_lsb: bool = False, channel_step: int = 1,
+                      chunk_frames: int = 1 << 16) -> str:
+        """Decodes a message from a WAV stream, reading frames only up to the terminator."""
+        data = bytearray()
+        with wave.open(src, 'rb') as audio:
+            params = audio.getparams()
+            pending = np.zeros(0, dtype=np.uint8)
+            while True:
+                chunk = audio.readframes(chunk_frames)
+                if not chunk:
+                    break
+                frames = np.frombuffer(chunk, dtype=np.uint8)
+                slots = AudioSteganography._carrier_slots(params, frames, sample_lsb, channel_step)
+                pending = np.concatenate((pending, (slots & 1).reshape(-1).astype(np.uint8)))
+                n_bits = len(pending) - len(pending) % 8
+                chunk = np.packbits(pending[:n_bits]).tobytes()
+                pending = pending[n_bits:]
+                end = chunk.find(b'\x00')
+                if end >= 0:
+                    data += chunk[:end]
+                    break
+                data += chunk
+
+        message = data.decode('latin-1')
+        if key:
+            message = AudioSteganography.decrypt_message(key, message)
+        return message
+
+    @staticmethod
+    def capacity(audio_path: str, sample_lsb: bool = False, channel_step: int = 1) -> int:
+        """Maximum message length in characters."""
+        if audio_path.endswith('.mp3'):
+            params, frames = AudioSteganography._load_frames(audio_path)
+            n_slots = AudioSteganography._carrier_slots(params, frames, sample_lsb, channel_step).size
+        else:
+            with wave.open(audio_path, 'rb') as audio:
+                if sample_lsb:
+                    n_slots = audio.getnframes() * len(range(0, audio.getnchannels(), channel_step))
+                else:
+                    n_slots = audio.getnframes() * audio.getsampwidth() * audio.getnchannels()
+        return n_slots // 8 - 1  # Null terminator
+
+    @staticmethod
+    def _peek_bits(audio_path: str, n_bits: int, sample_lsb: bool = False) -> np.ndarray:
+        """LSBs of the first n_bits carrier slots; WAV files are only read that far."""
         if audio_path.endswith('.mp3'):
-            audio = AudioSegment.from_mp3(audio_path)
-            audio.export("temp.wav", format="wav")
-            audio_path = "temp.wav"
+            params, frames = AudioSteganography._load_frames(audio_path)
+        else:
+            with wave.open(audio_path, 'rb') as audio:
+                params = audio.getparams()
+                slots_per_frame = params.nchannels if sample_lsb else params.sampwidth * params.nchannels
+                frames = audio.readframes(-(-n_bits // slots_per_frame))
+                frames = np.frombuffer(frames, dtype=np.uint8).copy()
+        slots = AudioSteganography._carrier_slots(params, frames, sample_lsb, 1)
+        return (slots.reshape(-1)[:n_bits] & 1).astype(np.uint8)
 
-        audio = wave.open(audio_path, 'rb')
-        params = audio.getparams()
-        frames = bytearray(audio.readframes(audio.getnframes()))
-        audio.close()
+    @staticmethod
+    def _load_frames(audio_path: str, writable: bool = False) -> tuple:
+        """Returns the WAV params and the raw frame bytes as a uint8 array.
 
-        if len(binary_msg) > len(frames):
-            raise ValueError("Message too large for the audio.")
+        Served from the carrier cache when it is enabled; cached frames are
+        shared and read-only unless writable is set.
+        """
+        cache = carrier_cache.active()
+        if cache is not None:
+            hit = cache.get(audio_path, 'audio')
+            if hit is not None:
+                params, frames = hit
+                return params, (np.array(frames) if writable else frames)
+
+        source = audio_path
+        if audio_path.endswith('.mp3'):
+            # Transcode in memory rather than through a temp WAV in the cwd
+            source = io.BytesIO()
+            AudioSegment.from_mp3(audio_path).export(source, format="wav")
+            source.seek(0)
 
-        for i in range(len(binary_msg)):
-            frames[i] = (frames[i] & ~1) | int(binary_msg[i])
+        with wave.open(source, 'rb') as audio:
+            params = audio.getparams()
+            frames = np.frombuffer(audio.readframes(audio.getnframes()), dtype=np.uint8).copy()
+        if cache is not None:
+            cache.put(audio_path, 'audio', params, frames.copy() if writable else frames)
+        return params, frames
 
+    @staticmethod
+    def _save_frames(params, frames: np.ndarray, output_path: str) -> None:
         with wave.open(output_path, 'wb') as encoded_audio:
             encoded_audio.setparams(params)
-            encoded_audio.writeframes(frames)
+            encoded_audio.writeframes(frames.tobytes())
 
     @staticmethod
-    def decode(audio_path: str, key: str = None) -> str:
-        if audio_path.endswith('.mp3'):
-            audio = AudioSegment.from_mp3(audio_path)
-            audio.export("temp.wav", format="wav")
-            audio_path = "temp.wav"
-
-        audio = wave.open(audio_path, 'rb')
-        frames = audio.readframes(audio.getnframes())
-        audio.close()
-
-        binary_msg = ''.join(str(byte & 1) for byte in frames)
-        message = ""
-        for i in range(0, len(binary_msg), 8):
-            byte = binary_msg[i:i+8]
-            if byte == '00000000':
-                break
-            message += chr(int(byte, 2))
-        if key:
-            message = AudioSteganography.decrypt_message(key, message)
+    def _read_payload(message) -> str:
+        """Accepts a message string or a readable text or binary stream."""
+        if hasattr(message, 'read'):
+            message = message.read()
+        if isinstance(message, bytes):
+            message = message.decode('latin-1')  # One character per payload byte
         return message
+
+    @staticmethod
+    def _message_bits(message: str) -> np.ndarray:
+        """Message bytes plus a null terminator, as an array of 0/1 bits.
+
+        Each character is stored as one byte, so only Latin-1 text can be
+        embedded as is; encrypted messages are base64 and always fit.
+        """
+        try:
+            data = np.frombuffer(message.encode('latin-1') + b'\x00', dtype=np.uint8)
+        except UnicodeEncodeError:
+            raise ValueError("Message has characters outside Latin-1; use a key to embed any text.") from None
+        return np.unpackbits(data)
+
+    @staticmethod
+    def _carrier_slots(params, frames: np.ndarray, sample_lsb: bool, channel_step: int) -> np.ndarray:
+        """2-D view over frames whose elements' bit 0 carries the message, in embedding order.
+
+        Byte mode is one slot per frame byte. Sample mode is (nframes, channels
+        used): int16/int32 sample views for 16/32-bit PCM and the low byte of
+        each little-endian sample for 8-bit and 24-bit PCM. Writes go through
+        to frames.
+        """
+        if not sample_lsb:
+            return frames.reshape(-1, 1)
+        if channel_step < 1:
+            raise ValueError("channel_step must be at least 1.")
+
+        sampwidth, nchannels = params.sampwidth, params.nchannels
+        nframes = len(frames) // (sampwidth * nchannels)
+        frames = frames[:nframes * sampwidth * nchannels]
+        if sampwidth in _SAMPLE_DTYPES:
+            samples = frames.view(_SAMPLE_DTYPES[sampwidth]).reshape(nframes, nchannels)
+        else:
+            samples = frames.reshape(nframes, nchannels, sampwidth)[:, :, 0]
+        return samples[:, ::channel_step]
+
+    @staticmethod
+    def _embed_slots(slots: np.ndarray, bits: np.ndarray) -> None:
+        """Writes bits into the leading carrier slots, one channel plane row at a time."""
+        n_rows = -(-len(bits) // slots.shape[1])
+        lead = slots[:n_rows].reshape(-1)  # A copy when channels are strided
+        lead[:len(bits)] ^= (lead[:len(bits)] ^ bits) & 1
+        slots[:n_rows] = lead.reshape(n_rows, -1)
+
+    @staticmethod
+    def _slot_index(slots: np.ndarray, positions: np.ndarray):
+        """Index into slots for flat slot positions, in embedding order."""
+        if slots.shape[1] == 1:
+            return positions, 0
+        return np.divmod(positions, slots.shape[1])
+
+    @staticmethod
+    def _embed_bits(frames: np.ndarray, bits: np.ndarray) -> None:
+        """Writes bits into the LSBs of the leading frame bytes, in place."""
+        frames[:len(bits)] = (frames[:len(bits)] & 0xFE) | bits
+
+    @staticmethod
+    def _extract_message(bits: np.ndarray) -> str:
+        """Reads bytes from a bit array up to the first null terminator."""
+        data = np.packbits(bits[:len(bits) - len(bits) % 8]).tobytes()
+        end = data.find(b'\x00')
+        return (data if end < 0 else data[:end]).decode('latin-1')
@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+
+class BatchCheckpoint:
+    """Append-only JSON-lines record of batch items, keyed by output path.
+
+    The first line holds a random salt for the secret fingerprints, so the
+    file cannot be used to test guesses of a key or payload offline.
+    """
+
+    def __init__(self, checkpoint_path: str):
+        self.checkpoint_path = checkpoint_path
+        self.entries = {}
+        self.salt = None
+        self._fingerprints = {}
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'r', encoding='utf-8') as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line from an interrupted run
+                    if 'salt' in entry:
+                        self.salt = bytes.fromhex(entry['salt'])
+                        continue
+                    # Later lines win, so a retried item overrides its failure
+                    self.entries[entry['output']] = entry
+        self._salt_written = self.salt is not None
+        if self.salt is None:
+            self.salt = os.urandom(16)
+
+    @staticmethod
+    def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+        """SHA-256 of a file's content, read in fixed-size chunks."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def secret_hash(self, text: str) -> str:
+        """Salted scrypt fingerprint of a secret, such as the payload."""
+        if text not in self._fingerprints:
+            digest = hashlib.scrypt(text.encode(), salt=self.salt, n=1 << 14, r=8, p=1, dklen=32)
+            self._fingerprints[text] = digest.hex()
+        return self._fingerprints[text]
+
+    def options_hash(self, **options) -> str:
+        """Fingerprint of the encode options, which include the key."""
+        return self.secret_hash(json.dumps(options, sort_keys=True))
+
+    @staticmethod
+    def _stat(path: str) -> list:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+
+    def is_done(self, input_path: str, output_path: str, payload_hash: str, options_hash: str) -> bool:
+        """True if output_path already holds this payload for this input and options."""
+        entry = self.entries.get(output_path)
+        if not entry or entry['status'] != 'done':
+            return False
+        if entry['payload'] != payload_hash or entry['options'] != options_hash:
+            return False
+        if not os.path.exists(input_path) or not os.path.exists(output_path):
+            return False
+
+        # Fast path: nothing has been touched since the item was recorded
+        if self._stat(output_path) != entry['output_stat']:
+            return False
+        if self._stat(input_path) == entry['input_stat']:
+            return True
+
+        # Input was touched (copied, restored, ...), so compare the content
+        input_hash = self.file_hash(input_path)
+        if input_hash != entry['input_hash']:
+            return False
+        self._append(dict(entry, input_stat=self._stat(input_path)))
+        return True
+
+    def record(self, input_path: str, output_path: str, payload_hash: str,
+               options_hash: str, input_hash: str, error: str = None) -> None:
+        """Record an item as done, or as failed when error is given."""
+        entry = {
+            'output': output_path,
+            'input': input_path,
+            'input_hash': input_hash,
+            'payload': payload_hash,
+            'options': options_hash,
+            'status': 'failed' if error else 'done',
+        }
+        if error:
+            entry['error'] = error
+        else:
+            entry['input_stat'] = self._stat(input_path)
+            entry['output_stat'] = self._stat(output_path)
+        self._append(entry)
+
+    def _append(self, entry: dict) -> None:
+        self.entries[entry['output']] = entry
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as fh:
+            if not self._salt_written:
+                fh.write(json.dumps({'salt': self.salt.hex()}) + '\n')
+                self._salt_written = True
+            fh.write(json.dumps(entry) + '\n')
@@ -0,0 +1,145 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+class CarrierCache:
+    """LRU cache of decoded carrier arrays with a byte budget.
+
+    Entries are keyed by (absolute path, size, mtime, options), so a file that
+    changes on disk is decoded again. Cached arrays are read-only; callers
+    copy whatever they are going to modify. When spill_dir is given, entries
+    evicted from memory (or too large for the budget) are written there as
+    raw .npy files and served back as read-only memmaps.
+    """
+
+    def __init__(self, max_bytes: int = 512 << 20, spill_dir: str = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.used_bytes = 0
+        self._entries = OrderedDict()  # key -> [meta, array or None, spill path or None]
+        self._keys_by_path = {}
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(path: str, options) -> tuple:
+        st = os.stat(path)
+        return os.path.abspath(path), st.st_size, st.st_mtime_ns, options
+
+    def get(self, path: str, options=None):
+        """Returns (meta, array) for a cached carrier, or None."""
+        key = self._key(path, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            meta, array, spill_path = entry
+            if array is None:
+                array = np.load(spill_path, mmap_mode='r')
+            return meta, array
+
+    def allocate(self, path: str, options, shape: tuple, dtype=np.uint8):
+        """Returns a writable array to decode a carrier into before put(), or None.
+
+        Carriers over max_bytes get a .npy memmap in spill_dir, so they never
+        have to fit in memory; without a spill_dir they cannot be cached at
+        all and None is returned, before anything has been decoded.
+        """
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if nbytes <= self.max_bytes:
+            return np.empty(shape, dtype)
+        if not self.spill_dir:
+            return None
+        spill_path = os.path.join(self.spill_dir, self._spill_name(self._key(path, options)))
+        return np.lib.format.open_memmap(spill_path, mode='w+', dtype=dtype, shape=shape)
+
+    def discard(self, array: np.ndarray) -> None:
+        """Frees an array from allocate() that will not be put after all."""
+        if isinstance(array, np.memmap) and array.filename and os.path.exists(array.filename):
+            os.remove(array.filename)
+
+    def put(self, path: str, options, meta, array: np.ndarray) -> None:
+        """Caches a decoded carrier, taking ownership of array."""
+        key = self._key(path, options)
+        array.flags.writeable = False
+        with self._lock:
+            # A new mtime or size makes any older entry for the path stale
+            stale = self._keys_by_path.pop((key[0], options), None)
+            if stale is not None:
+                self._drop(stale, keep=getattr(array, 'filename', None))
+
+            if isinstance(array, np.memmap) and array.filename:
+                # Decoded straight into a spill file by allocate()
+                array.flush()
+                self._entries[key] = [meta, None, array.filename]
+            elif array.nbytes > self.max_bytes:
+                if not self.spill_dir:
+                    return
+                self._entries[key] = [meta, None, self._spill(key, array)]
+            else:
+                self._entries[key] = [meta, array, None]
+                self.used_bytes += array.nbytes
+            self._keys_by_path[(key[0], options)] = key
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+            self._keys_by_path.clear()
+
+    def _evict(self) -> None:
+        for key, entry in list(self._entries.items()):
+            if self.used_bytes <= self.max_bytes:
+                break
+            meta, array, _ = entry
+            if array is None:
+                continue
+            self.used_bytes -= array.nbytes
+            if self.spill_dir:
+                self._entries[key] = [meta, None, self._spill(key, array)]
+            else:
+                del self._entries[key]
+                self._keys_by_path.pop((key[0], key[3]), None)
+
+    @staticmethod
+    def _spill_name(key: tuple) -> str:
+        return hashlib.sha256(repr(key).encode()).hexdigest() + '.npy'
+
+    def _spill(self, key: tuple, array: np.ndarray) -> str:
+        spill_path = os.path.join(self.spill_dir, self._spill_name(key))
+        np.save(spill_path, array)
+        return spill_path
+
+    def _drop(self, key: tuple, keep: str = None) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, array, spill_path = entry
+        if array is not None:
+            self.used_bytes -= array.nbytes
+        if spill_path and os.path.abspath(spill_path) != keep and os.path.exists(spill_path):
+            os.remove(spill_path)
+
+# The cache is opt-in: engines only consult it after enable() is called
+_active_cache = None
+
+def enable(max_bytes: int = 512 << 20, spill_dir: str = None) -> CarrierCache:
+    """Turns on carrier caching for all engines in this process."""
+    global _active_cache
+    _active_cache = CarrierCache(max_bytes, spill_dir)
+    return _active_cache
+
+def disable() -> None:
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.clear()
+    _active_cache = None
+
+def active():
+    """The enabled CarrierCache, or None."""
+    return _active_cache
@@ -1,7 +1,18 @@
 import os
+import sys
+import argparse
 from image_stego import ImageSteganography
 from audio_stego import AudioSteganography
 from video_stego import VideoSteganography
+from batch_checkpoint import BatchCheckpoint
+from scan import scan
+from media import media_type, written_path
+
+# cv2 only opens video by path, so video carriers cannot be piped
+_PIPE_HANDLERS = {
+    'image': ImageSteganography,
+    'audio': AudioSteganography,
+}
 
 def main():
     while True:
@@ -43,7 +54,11 @@ def handle_image_stego():
             print("Error: AES key must be 16, 24, or 32 characters long.")
             key = input("Enter a valid encryption key: ")
 
-        ImageSteganography.encode(input_file, message, output_file, key)
+        try:
+            ImageSteganography.encode(input_file, message, output_file, key)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
         print(f"Message encoded successfully in {output_file}")
     
     elif action == '2':
@@ -63,7 +78,11 @@ def handle_audio_stego():
         output_file = input("Enter output audio file path: ")
         message = input("Enter the message to encode: ")
         key = input("Enter encryption key (optional): ")
-        AudioSteganography.encode(input_file, message, output_file, key)
+        try:
+            AudioSteganography.encode(input_file, message, output_file, key)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
         print(f"Message encoded successfully in {output_file}")
 
     elif action == '2':
@@ -83,7 +102,11 @@ def handle_video_stego():
         output_file = input("Enter output video file path: ")
         message = input("Enter the message to encode: ")
         key = input("Enter encryption key (optional): ")
-        VideoSteganography.encode(input_file, message, output_file, key)
+        try:
+            VideoSteganography.encode(input_file, message, output_file, key)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
         print(f"Message encoded successfully in {output_file}")
 
     elif action == '2':
@@ -103,16 +126,50 @@ def handle_batch_processing():
         output_files = input("Enter output file paths (comma-separated): ").split(',')
         message = input("Enter the message to encode: ")
         key = input("Enter encryption key (optional): ")
+        checkpoint_path = input("Enter checkpoint file path (optional, enables resume): ")
+        checkpoint = BatchCheckpoint(checkpoint_path) if checkpoint_path else None
+        payload_hash = checkpoint.secret_hash(message) if checkpoint else None
+        skipped, failed = 0, 0
 
         for input_file, output_file in zip(input_files, output_files):
+            input_file, output_file = input_file.strip(), output_file.strip()
             if input_file.endswith(('.png', '.bmp', '.jpg', '.jpeg')):
-                ImageSteganography.encode(input_file, message, output_file, key)
+                stego = ImageSteganography
             elif input_file.endswith(('.wav', '.mp3')):
-                AudioSteganography.encode(input_file, message, output_file, key)
+                stego = AudioSteganography
             elif input_file.endswith(('.avi', '.mp4')):
-                VideoSteganography.encode(input_file, message, output_file, key)
+                stego = VideoSteganography
+            else:
+                print(f"Skipping {input_file}: unsupported file type")
+                continue
+
+            if checkpoint is None:
+                stego.encode(input_file, message, output_file, key)
+                print(f"Message encoded successfully in {output_file}")
+                continue
+
+            # Check and record the file the engine really writes (video is always .avi)
+            output_file = written_path(output_file, media_type(input_file))
+            options_hash = checkpoint.options_hash(handler=stego.__name__, key=key)
+            if checkpoint.is_done(input_file, output_file, payload_hash, options_hash):
+                skipped += 1
+                continue
+
+            # Hash before encoding, since the output may overwrite the input
+            input_hash = BatchCheckpoint.file_hash(input_file) if os.path.exists(input_file) else None
+            try:
+                stego.encode(input_file, message, output_file, key)
+                checkpoint.record(input_file, output_file, payload_hash, options_hash, input_hash)
+            except Exception as e:
+                failed += 1
+                checkpoint.record(input_file, output_file, payload_hash, options_hash, input_hash, error=str(e))
+                print(f"Failed to encode {input_file}: {e}")
+                continue
             print(f"Message encoded successfully in {output_file}")
 
+        if checkpoint is not None:
+            print(f"Batch finished: {skipped} already done, {failed} failed (re-run to retry)")
+
     elif action == '2':
         input_files = input("Enter input file paths (comma-separated): ").split(',')
         key = input("Enter decryption key (optional): ")
@@ -126,5 +183,63 @@ def handle_batch_processing():
                 decoded_message = VideoSteganography.decode(input_file, key)
             print(f"Decoded message from {input_file}: {decoded_message}")
 
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Steganography tool. Run without arguments for the interactive menu.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = commands.add_parser('scan', help="Index files that carry an embedded payload")
+    scan_parser.add_argument('paths', nargs='+', help="Files or directories to scan")
+    scan_parser.add_argument('--index', required=True,
+                             help="Index to write: SQLite for .db/.sqlite/.sqlite3, CSV otherwise")
+    scan_parser.add_argument('--bits', type=int, default=512, help="Leading carrier bits to read per file")
+    scan_parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+
+    pipe_parser = commands.add_parser('pipe', help="Encode or decode between streams (stdin/stdout by default)")
+    pipe_parser.add_argument('media', choices=sorted(_PIPE_HANDLERS), help="Carrier type (PNG output for images, WAV for audio)")
+    pipe_parser.add_argument('action', choices=['encode', 'decode'])
+    pipe_parser.add_argument('--input', default='-', help="Carrier file, or - for stdin")
+    pipe_parser.add_argument('--output', default='-', help="Stego file or decoded payload, or - for stdout")
+    payload = pipe_parser.add_mutually_exclusive_group()
+    payload.add_argument('--message', help="Message to encode")
+    payload.add_argument('--message-file', help="File or FIFO to read the payload from, or - for stdin")
+    pipe_parser.add_argument('--key', default=None, help="Encryption key (16, 24 or 32 characters)")
+    return parser
+
+def _open_pipe_stream(path: str, mode: str):
+    if path == '-':
+        stream = sys.stdin.buffer if 'r' in mode else sys.stdout.buffer
+        return open(stream.fileno(), mode, closefd=False)
+    return open(path, mode)
+
+def run_pipe(args) -> None:
+    handler = _PIPE_HANDLERS[args.media]
+    with _open_pipe_stream(args.input, 'rb') as src, _open_pipe_stream(args.output, 'wb') as dst:
+        if args.action == 'decode':
+            # Payloads are bytes end to end, one character per byte
+            dst.write(handler.decode_stream(src, args.key).encode('latin-1'))
+            return
+
+        if args.message is not None:
+            handler.encode_stream(src, args.message.encode(), dst, args.key)
+        else:
+            with _open_pipe_stream(args.message_file, 'rb') as payload:
+                handler.encode_stream(src, payload, dst, args.key)
+
+def run_command(argv: list) -> None:
+    args = build_parser().parse_args(argv)
+    if args.command == 'scan':
+        hits = scan(args.paths, args.index, args.bits, args.workers)
+        print(f"Found {hits} payload-bearing files; index written to {args.index}")
+    elif args.command == 'pipe':
+        if args.action == 'encode':
+            if args.message is None and args.message_file is None:
+                sys.exit("pipe encode needs --message or --message-file")
+            if args.message_file == '-' and args.input == '-':
+                sys.exit("stdin cannot carry both the carrier and the payload")
+        run_pipe(args)
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        run_command(sys.argv[1:])
+    else:
+        main()
@@ -0,0 +1,172 @@
+import os
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from image_stego import ImageSteganography
+from audio_stego import AudioSteganography
+from video_stego import VideoSteganography
+from media import media_type
+
+# Worker-side view of the shared cover, set up once per process by _attach_cover
+_cover = {}
+
+def _attach_cover(shm_name: str, shape: tuple, dtype: str, media: str, meta: dict) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _cover['shm'] = shm  # Keep the mapping alive for the life of the worker
+    _cover['data'] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _cover['media'] = media
+    _cover['meta'] = meta
+
+def _write_output(bits: np.ndarray, output_path: str) -> str:
+    """Embeds one payload into a private copy of the shared cover and writes it."""
+    cover, media, meta = _cover['data'], _cover['media'], _cover['meta']
+
+    if media == 'image':
+        pixels = cover.copy()
+        ImageSteganography._embed_bits(pixels, bits)
+        ImageSteganography._save_pixels(pixels, meta['mode'], meta['size'], output_path)
+
+    elif media == 'audio':
+        frames = cover.copy()
+        AudioSteganography._embed_bits(frames, bits)
+        AudioSteganography._save_frames(meta['params'], frames, output_path)
+
+    else:
+        # Only the frames that carry payload are copied; the rest are written
+        # straight from shared memory
+        n_payload_frames = -(-len(bits) // cover[0].size)
+        payload_frames = cover[:n_payload_frames].copy()
+        bit_idx = 0
+        for frame in payload_frames:
+            bit_idx += VideoSteganography._embed_bits(frame, bits[bit_idx:])
+
+        out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'FFV1'), meta['fps'],
+                              (cover.shape[2], cover.shape[1]), isColor=True)
+        try:
+            for frame in payload_frames:
+                out.write(frame)
+            for frame in cover[n_payload_frames:]:
+                out.write(frame)
+        finally:
+            out.release()
+
+    return output_path
+
+class FanOutEncoder:
+    """Embeds many payloads into copies of one cover, decoding the cover only once.
+
+    The decoded cover is held in shared memory, so worker processes can build
+    and write their outputs in parallel without re-decoding or pickling it.
+    Outputs are always written fresh; existing messages are not appended to.
+    """
+
+    def __init__(self, cover_path: str, key: str = None):
+        if not os.path.exists(cover_path):
+            raise FileNotFoundError("Error: Input cover file does not exist.")
+
+        self.key = key
+        self.media = media_type(cover_path)
+        self.meta = {}
+        self._shm = None
+
+        try:
+            if self.media == 'image':
+                mode, size, data = ImageSteganography._load_image(cover_path)
+                self.meta = {'mode': mode, 'size': size}
+                self._share(data)
+            elif self.media == 'audio':
+                params, data = AudioSteganography._load_frames(cover_path)
+                self.meta = {'params': params}
+                self._share(data)
+            else:
+                self._share_video(cover_path)
+        except Exception:
+            self.close()
+            raise
+
+    def _share(self, data: np.ndarray) -> None:
+        if data.size == 0:
+            raise ValueError("Cover file contains no data.")
+        self._shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        self.data = np.ndarray(data.shape, dtype=data.dtype, buffer=self._shm.buf)
+        self.data[...] = data
+
+    def _share_video(self, video_path: str) -> None:
+        """Decodes frames directly into shared memory, avoiding a second copy."""
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open input video: {video_path}")
+        try:
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            if frame_count * height * width == 0:
+                raise ValueError("Cover file contains no data.")
+            self.meta = {'fps': cap.get(cv2.CAP_PROP_FPS)}
+
+            self._shm = shared_memory.SharedMemory(create=True, size=frame_count * height * width * 3)
+            frames = np.ndarray((frame_count, height, width, 3), dtype=np.uint8, buffer=self._shm.buf)
+            n_read = 0
+            while n_read < frame_count:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames[n_read] = frame
+                n_read += 1
+            # The container's frame count is only an estimate
+            self.data = frames[:n_read]
+        finally:
+            cap.release()
+
+    def _payload_bits(self, message: str) -> np.ndarray:
+        if self.media == 'image':
+            if self.key:
+                message = ImageSteganography.encrypt_message(self.key, message)
+            return ImageSteganography._message_bits(message)
+        if self.media == 'audio':
+            if self.key:
+                message = AudioSteganography.encrypt_message(self.key, message)
+            return AudioSteganography._message_bits(message)
+        if self.key:
+            message = VideoSteganography.encrypt_message(self.key, message)
+        return VideoSteganography._message_bits(message)
+
+    def _capacity(self) -> int:
+        if self.media == 'image':
+            return self.data.shape[0] * 3
+        return self.data.size
+
+    def encode_many(self, messages: list, output_paths: list, workers: int = None) -> list:
+        """Encodes messages[i] into output_paths[i]; returns the paths written."""
+        if len(messages) != len(output_paths):
+            raise ValueError("Each message needs exactly one output path.")
+        if self.media == 'video':
+            output_paths = [os.path.splitext(path)[0] + '.avi' for path in output_paths]
+
+        capacity = self._capacity()
+        payloads = []
+        for message in messages:
+            bits = self._payload_bits(message)
+            if len(bits) > capacity:
+                raise ValueError(f"Message too large ({len(bits)}/{capacity} bits)")
+            payloads.append(bits)
+
+        initargs = (self._shm.name, self.data.shape, self.data.dtype.str, self.media, self.meta)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_cover,
+                                 initargs=initargs) as pool:
+            return list(pool.map(_write_output, payloads, output_paths))
+
+    def close(self) -> None:
+        """Releases the shared cover buffer."""
+        if self._shm is not None:
+            self.data = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
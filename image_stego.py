@@ -1,8 +1,17 @@
+import io
 import os
+import numpy as np
 from PIL import Image
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 import base64
+import tempfile
+from png_stream import PNGReader, PNGWriter, PrefixedStream, unfilter_row
+from scatter import KeyedScatter
+import carrier_cache
+
+# Raw (uncompressed) PIL row layouts that strip decoding handles, with bytes per pixel
+_RAW_MODES = {'RGB': 3, 'BGR': 3, 'RGBX': 4, 'BGRX': 4, 'RGBA': 4, 'BGRA': 4}
 
 class ImageSteganography:
     @staticmethod
@@ -18,12 +27,19 @@ class ImageSteganography:
         return decrypted_msg.decode()
 
     @staticmethod
-    def encode(image_path: str, message: str, output_path: str, key: str = None) -> None:
-        """Encodes a secret message into an image using LSB steganography."""
+    def encode(image_path: str, message: str, output_path: str, key: str = None,
+               memory_budget: int = None, scatter: bool = False) -> None:
+        """Encodes a secret message into an image using LSB steganography.
+
+        With memory_budget (bytes), the image is processed in row strips and
+        written as PNG; see _encode_tiled. With scatter, bits are spread over
+        the image in an order derived from the key instead of sequentially.
+        """
+        if scatter and memory_budget:
+            raise ValueError("Keyed scatter touches the whole image and cannot be tiled.")
         if not os.path.exists(image_path):
             raise FileNotFoundError("Error: Input image file does not exist.")
 
-        img = Image.open(image_path)
         if key:
             message = ImageSteganography.encrypt_message(key, message)
 
@@ -31,7 +47,7 @@ class ImageSteganography:
         existing_message = ""
         if os.path.exists(output_path):
             try:
-                existing_message = ImageSteganography.decode(output_path, key)
+                existing_message = ImageSteganography.decode(output_path, key, memory_budget, scatter)
             except Exception:
                 existing_message = ""
 
@@ -39,46 +55,415 @@ class ImageSteganography:
         if existing_message and existing_message not in message:
             message = existing_message + "\n" + message
 
-        # Convert message to binary
-        binary_msg = ''.join(format(ord(c), '08b') for c in message) + '00000000'  # Null terminator
-        pixels = list(img.getdata())
-        width, height = img.size
+        if memory_budget:
+            ImageSteganography._encode_tiled(image_path, ImageSteganography._message_bits(message),
+                                             output_path, memory_budget)
+            print(f"Message successfully encoded into {output_path}")
+            return
+
+        mode, size, pixels = ImageSteganography._load_image(image_path, writable=True)
+        bits = ImageSteganography._message_bits(message)
+        width, height = size
 
-        if len(binary_msg) > width * height * 3:
+        if len(bits) > width * height * 3:
             raise ValueError("Message too large for the image.")
 
-        idx = 0
-        for i in range(len(pixels)):
-            pixel = list(pixels[i])
-            for j in range(3):  # RGB channels
-                if idx < len(binary_msg):
-                    pixel[j] = (pixel[j] & ~1) | int(binary_msg[idx])
-                    idx += 1
-            pixels[i] = tuple(pixel)
-
-        encoded_img = Image.new(img.mode, img.size)
-        encoded_img.putdata(pixels)
-        encoded_img.save(output_path)
+        if scatter:
+            ImageSteganography._scatter_bits(pixels, bits, key)
+        else:
+            ImageSteganography._embed_bits(pixels, bits)
+        ImageSteganography._save_pixels(pixels, mode, size, output_path)
+
+        # Lossless outputs can seed the cache, so a verify-decode skips decoding
+        cache = carrier_cache.active()
+        if cache is not None and output_path.lower().endswith(('.png', '.bmp')):
+            cache.put(output_path, 'image', (mode, size), pixels)
         print(f"Message successfully encoded into {output_path}")
 
     @staticmethod
-    def decode(image_path: str, key: str = None) -> str:
-        """Decodes a secret message from an image using LSB steganography."""
-        img = Image.open(image_path)
-        pixels = list(img.getdata())
-        binary_msg = ""
-        for pixel in pixels:
-            for value in pixel[:3]:  # RGB channels
-                binary_msg += str(value & 1)
-
-        # Extract message up to null terminator
-        message = ""
-        for i in range(0, len(binary_msg), 8):
-            byte = binary_msg[i:i+8]
-            if byte == '00000000':
-                break
-            message += chr(int(byte, 2))
+    def decode(image_path: str, key: str = None, memory_budget: int = None,
+               scatter: bool = False) -> str:
+        """Decodes a secret message from an image using LSB steganography.
+
+        With memory_budget (bytes), rows are read in strips only up to the
+        null terminator instead of decoding the whole image; see _image_strips.
+        """
+        if scatter:
+            _, _, pixels = ImageSteganography._load_image(image_path)
+            flat = pixels.reshape(-1)
+            order = KeyedScatter(key, pixels.shape[0] * 3)
+            message = order.read_message(
+                lambda pos: flat[ImageSteganography._rgb_index(pixels, pos)] & 1).decode('latin-1')
+        elif memory_budget:
+            message = ImageSteganography._decode_tiled(image_path, memory_budget)
+        else:
+            _, _, pixels = ImageSteganography._load_image(image_path)
+            message = ImageSteganography._extract_message(pixels[:, :3].reshape(-1) & 1)
+
+        if key:
+            message = ImageSteganography.decrypt_message(key, message)
+        return message
+
+    @staticmethod
+    def encode_stream(src, message, dst, key: str = None, memory_budget: int = 64 << 20) -> None:
+        """Encodes a message read from a carrier stream and writes a PNG to dst as it goes.
+
+        src and dst are binary file objects and need not be seekable (e.g.
+        stdin and stdout); message may be a string or a readable stream. An
+        8-bit RGB/RGBA PNG carrier is streamed row by row within
+        memory_budget, as in tiled mode; other formats are buffered and
+        decoded by PIL. There is no existing output to append to.
+        """
+        message = ImageSteganography._read_payload(message)
+        if key:
+            message = ImageSteganography.encrypt_message(key, message)
+        bits = ImageSteganography._message_bits(message)
+
+        reader, buffered = ImageSteganography._open_stream(src)
+        if reader is not None:
+            read_size, chunk_size = ImageSteganography._tiled_sizes(memory_budget, reader.stride)
+            reader.read_size = read_size
+            ImageSteganography._stream_png(reader, bits, dst, chunk_size)
+            return
+
+        img, pixels = ImageSteganography._load_pixels(Image.open(buffered))
+        width, height = img.size
+        if len(bits) > width * height * 3:
+            raise ValueError("Message too large for the image.")
+        ImageSteganography._embed_bits(pixels, bits)
+        writer = PNGWriter(dst, width, height, img.mode)
+        for row in pixels.reshape(height, width, -1):
+            writer.write_row(row)
+        writer.close()
+
+    @staticmethod
+    def decode_stream(src, key: str = None, memory_budget: int = 64 << 20) -> str:
+        """Decodes a message from a carrier stream, reading PNG rows only up to the terminator."""
+        reader, buffered = ImageSteganography._open_stream(src)
+        if reader is not None:
+            reader.read_size = ImageSteganography._tiled_sizes(memory_budget, reader.stride)[0]
+            message = ImageSteganography._read_rows(reader.rows())
+        else:
+            _, pixels = ImageSteganography._load_pixels(Image.open(buffered))
+            message = ImageSteganography._extract_message(pixels[:, :3].reshape(-1) & 1)
 
         if key:
             message = ImageSteganography.decrypt_message(key, message)
         return message
+
+    @staticmethod
+    def capacity(image_path: str) -> int:
+        """Maximum message length in characters, read from the header only.
+
+        Modes the engine cannot embed into (fewer than three 8-bit bands,
+        e.g. L, LA or P) have no capacity.
+        """
+        img = Image.open(image_path)
+        if len(img.getbands()) < 3 or Image.getmodetype(img.mode) != 'L':
+            return 0
+        width, height = img.size
+        return (width * height * 3) // 8 - 1  # Null terminator
+
+    @staticmethod
+    def _tiled_sizes(memory_budget: int, stride: int) -> tuple:
+        """Splits a memory budget into (inflate read size, IDAT chunk size)."""
+        if memory_budget < 4 * (stride + 1) + (1 << 20):
+            raise ValueError(f"Memory budget too small for rows of {stride} bytes.")
+        return memory_budget // 4, min(memory_budget // 4, 1 << 20)
+
+    @staticmethod
+    def _encode_tiled(image_path: str, bits: np.ndarray, output_path: str, memory_budget: int) -> None:
+        """Embeds bits while holding only a row strip of the image at a time.
+
+        For an 8-bit RGB/RGBA non-interlaced PNG, only the rows that carry
+        payload (and the row after them, whose filter may refer back to
+        them) are unfiltered and rewritten; every other row is passed through
+        as its original filtered bytes, so peak memory is set by the budget
+        rather than by the image size. Other inputs are read in strips where
+        possible and must otherwise fit the budget; see _image_strips.
+        Output is always PNG, written to a temp
+        file beside output_path and moved into place, so input and output
+        may be the same file.
+        """
+        if not output_path.lower().endswith('.png'):
+            raise ValueError("Tiled encoding writes PNG output only.")
+
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.png', dir=os.path.dirname(output_path) or '.')
+        try:
+            with open(image_path, 'rb') as src, os.fdopen(temp_fd, 'wb') as dst:
+                try:
+                    reader = PNGReader(src)
+                except ValueError:
+                    reader = None
+
+                if reader is not None:
+                    read_size, chunk_size = ImageSteganography._tiled_sizes(memory_budget, reader.stride)
+                    reader.read_size = read_size
+                    ImageSteganography._stream_png(reader, bits, dst, chunk_size)
+                else:
+                    src.seek(0)
+                    img = Image.open(src)
+                    width, height = img.size
+                    if len(bits) > width * height * 3:
+                        raise ValueError("Message too large for the image.")
+                    _, chunk_size = ImageSteganography._tiled_sizes(memory_budget, width * len(img.getbands()))
+                    writer = PNGWriter(dst, width, height, img.mode, chunk_size=chunk_size)
+                    row_bits = 3 * width
+                    for y0, pixels in ImageSteganography._image_strips(img, src, memory_budget):
+                        n_rows = len(pixels) // width
+                        ImageSteganography._embed_bits(pixels, bits[y0 * row_bits:(y0 + n_rows) * row_bits])
+                        for row in pixels.reshape(n_rows, width, -1):
+                            writer.write_row(row)
+                    writer.close()
+            os.replace(temp_path, output_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def _stream_png(reader: PNGReader, bits: np.ndarray, dst, chunk_size: int) -> None:
+        width, height = reader.size
+        if len(bits) > width * height * 3:
+            raise ValueError("Message too large for the image.")
+
+        row_bits = 3 * width
+        payload_rows = -(-len(bits) // row_bits)
+        writer = PNGWriter(dst, width, height, reader.mode, reader.leading_chunks, chunk_size)
+        prev = np.zeros(reader.stride, dtype=np.uint8)
+        for y, (filter_type, row) in enumerate(reader.filtered_rows()):
+            if y > payload_rows:
+                writer.write_filtered_row(filter_type, row)
+                continue
+            prev = unfilter_row(filter_type, row, prev, reader.channels)
+            pixels = prev.reshape(width, reader.channels).copy()
+            if y < payload_rows:
+                ImageSteganography._embed_bits(pixels, bits[y * row_bits:(y + 1) * row_bits])
+            writer.write_row(pixels)
+        reader.finish()
+        writer.close(reader.trailing_chunks)
+
+    @staticmethod
+    def _image_strips(img: Image.Image, fp, memory_budget: int):
+        """Yields (first row, (rows * width, channels) pixels) for an image PIL has opened from fp.
+
+        Uncompressed images that PIL describes as full-width raw tiles (BMP,
+        strip TIFF) are read a strip of rows at a time straight from fp, so
+        memory stays within the budget. Anything else has to be decoded
+        whole, and raises ValueError when that would not fit the budget.
+        """
+        width, height = img.size
+        stride = width * len(img.getbands())
+        tiles = ImageSteganography._raw_tiles(img)
+        if tiles is None:
+            if height * stride > memory_budget:
+                raise ValueError(f"{img.format} image needs {height * stride} bytes decoded at once, "
+                                 f"over the memory budget; only PNG, BMP and uncompressed TIFF "
+                                 f"are read in strips.")
+            _, pixels = ImageSteganography._load_pixels(img)
+            yield 0, pixels
+            return
+
+        # The raw bytes, PIL's unpacked copy and the pixel array each hold a
+        # strip, next to the PNG writer's chunk buffer from _tiled_sizes
+        ImageSteganography._tiled_sizes(memory_budget, stride)
+        rows_per_strip = max(1, memory_budget // 8 // stride)
+        for y0 in range(0, height, rows_per_strip):
+            y1 = min(height, y0 + rows_per_strip)
+            yield y0, ImageSteganography._read_raw_rows(img, fp, tiles, y0, y1)
+
+    @staticmethod
+    def _raw_tiles(img: Image.Image):
+        """(top, bottom, offset, rawmode, stride, ystep) per tile, or None unless every tile is raw and full width."""
+        if img.mode not in ('RGB', 'RGBA'):
+            return None
+        tiles = []
+        for codec, (x0, top, x1, bottom), offset, args in img.tile:
+            if codec != 'raw' or x0 != 0 or x1 != img.width:
+                return None
+            rawmode, stride, ystep = args if isinstance(args, tuple) else (args, 0, 1)
+            if rawmode not in _RAW_MODES or ystep not in (1, -1):
+                return None
+            tiles.append((top, bottom, offset, rawmode, stride or img.width * _RAW_MODES[rawmode], ystep))
+        return tiles
+
+    @staticmethod
+    def _read_raw_rows(img: Image.Image, fp, tiles: list, y0: int, y1: int) -> np.ndarray:
+        """Reads and unpacks rows y0 .. y1 - 1 from the raw tiles that hold them."""
+        parts = []
+        for top, bottom, offset, rawmode, stride, ystep in tiles:
+            first, last = max(y0, top), min(y1, bottom)
+            if first >= last:
+                continue
+            # Bottom-up tiles (BMP) store their last row first
+            skip = first - top if ystep == 1 else bottom - last
+            fp.seek(offset + skip * stride)
+            data = fp.read((last - first) * stride)
+            if len(data) < (last - first) * stride:
+                raise ValueError("Truncated image data")
+            strip = Image.frombuffer(img.mode, (img.width, last - first), data, 'raw', rawmode, stride, ystep)
+            parts.append(np.array(strip).reshape(-1, len(img.mode)))
+        return np.concatenate(parts)
+
+    @staticmethod
+    def _decode_tiled(image_path: str, memory_budget: int) -> str:
+        """Reads rows up to the null terminator, a PNG row or a strip at a time."""
+        with open(image_path, 'rb') as fp:
+            try:
+                reader = PNGReader(fp)
+            except ValueError:
+                reader = None
+            if reader is not None:
+                reader.read_size = ImageSteganography._tiled_sizes(memory_budget, reader.stride)[0]
+                return ImageSteganography._read_rows(reader.rows())
+            fp.seek(0)
+            strips = ImageSteganography._image_strips(Image.open(fp), fp, memory_budget)
+            return ImageSteganography._read_rows(pixels for _, pixels in strips)
+
+    @staticmethod
+    def _read_rows(rows) -> str:
+        """Reads a message from pixel rows or strips in order, stopping at the null terminator."""
+        data = bytearray()
+        pending = np.zeros(0, dtype=np.uint8)
+        for row in rows:
+            pending = np.concatenate((pending, row[:, :3].reshape(-1) & 1))
+            n_bits = len(pending) - len(pending) % 8
+            chunk = np.packbits(pending[:n_bits]).tobytes()
+            pending = pending[n_bits:]
+            end = chunk.find(b'\x00')
+            if end >= 0:
+                data += chunk[:end]
+                break
+            data += chunk
+        return data.decode('latin-1')
+
+    @staticmethod
+    def _open_stream(src) -> tuple:
+        """Returns (PNGReader, None) for a streamable PNG, else (None, the whole stream buffered).
+
+        Only the signature and IHDR are sniffed, so other inputs can still be
+        handed to PIL even when src cannot seek back.
+        """
+        head = src.read(33)  # Signature plus the IHDR chunk
+        stream = PrefixedStream(head, src)
+        try:
+            return PNGReader(stream), None
+        except ValueError:
+            if not stream.within_prefix:
+                raise  # A PNG that is damaged further in
+            return None, io.BytesIO(head + src.read())
+
+    @staticmethod
+    def _read_payload(message) -> str:
+        """Accepts a message string or a readable text or binary stream."""
+        if hasattr(message, 'read'):
+            message = message.read()
+        if isinstance(message, bytes):
+            message = message.decode('latin-1')  # One character per payload byte
+        return message
+
+    @staticmethod
+    def _peek_bits(image_path: str, n_bits: int) -> np.ndarray:
+        """LSBs of the first n_bits RGB values, decoding as few rows as possible.
+
+        PNG rows are inflated only that far, and BMP and uncompressed TIFF
+        rows are read straight from the file; other formats are decoded whole.
+        """
+        n_pixels = -(-n_bits // 3)
+        with open(image_path, 'rb') as fp:
+            try:
+                reader = PNGReader(fp)
+            except ValueError:
+                reader = None
+            if reader is not None:
+                rows = []
+                for row in reader.rows():
+                    rows.append(row[:, :3])
+                    if len(rows) * reader.width >= n_pixels:
+                        break
+                pixels = np.concatenate(rows)
+            else:
+                fp.seek(0)
+                img = Image.open(fp)
+                tiles = ImageSteganography._raw_tiles(img)
+                if tiles is not None:
+                    n_rows = min(img.height, -(-n_pixels // img.width))
+                    pixels = ImageSteganography._read_raw_rows(img, fp, tiles, 0, n_rows)
+                else:
+                    _, pixels = ImageSteganography._load_pixels(img)
+        return (pixels[:n_pixels, :3].reshape(-1) & 1)[:n_bits]
+
+    @staticmethod
+    def _load_image(image_path: str, writable: bool = False) -> tuple:
+        """Returns (mode, size, pixels), served from the carrier cache when it is enabled.
+
+        Cached pixels are shared and read-only unless writable is set.
+        """
+        cache = carrier_cache.active()
+        if cache is not None:
+            hit = cache.get(image_path, 'image')
+            if hit is not None:
+                (mode, size), pixels = hit
+                return mode, size, (np.array(pixels) if writable else pixels)
+
+        img, pixels = ImageSteganography._load_pixels(Image.open(image_path))
+        if cache is not None:
+            cache.put(image_path, 'image', (img.mode, img.size), pixels.copy() if writable else pixels)
+        return img.mode, img.size, pixels
+
+    @staticmethod
+    def _load_pixels(img: Image.Image) -> tuple:
+        """Returns the image and its pixels as a (width * height, channels) uint8 array."""
+        pixels = np.array(img)
+        if pixels.ndim != 3 or pixels.dtype != np.uint8 or pixels.shape[2] < 3:
+            raise ValueError(f"Unsupported image mode: {img.mode}")
+        return img, pixels.reshape(-1, pixels.shape[2])
+
+    @staticmethod
+    def _save_pixels(pixels: np.ndarray, mode: str, size: tuple, output_path: str) -> None:
+        width, height = size
+        Image.fromarray(pixels.reshape(height, width, -1), mode).save(output_path)
+
+    @staticmethod
+    def _message_bits(message: str) -> np.ndarray:
+        """Message bytes plus a null terminator, as an array of 0/1 bits.
+
+        Each character is stored as one byte, so only Latin-1 text can be
+        embedded as is; encrypted messages are base64 and always fit.
+        """
+        try:
+            data = np.frombuffer(message.encode('latin-1') + b'\x00', dtype=np.uint8)
+        except UnicodeEncodeError:
+            raise ValueError("Message has characters outside Latin-1; use a key to embed any text.") from None
+        return np.unpackbits(data)
+
+    @staticmethod
+    def _embed_bits(pixels: np.ndarray, bits: np.ndarray) -> None:
+        """Writes bits into the RGB LSBs of the leading pixels, in place."""
+        n_pixels = -(-len(bits) // 3)
+        rgb = pixels[:n_pixels, :3].reshape(-1)
+        rgb[:len(bits)] = (rgb[:len(bits)] & 0xFE) | bits
+        pixels[:n_pixels, :3] = rgb.reshape(n_pixels, 3)
+
+    @staticmethod
+    def _scatter_bits(pixels: np.ndarray, bits: np.ndarray, key: str) -> None:
+        """Writes bits into RGB LSBs in keyed pseudo-random order, in place."""
+        flat = pixels.reshape(-1)
+        # The scatter header carries the length, so the terminator is left off
+        for pos, chunk in KeyedScatter(key, pixels.shape[0] * 3).placements(bits[:-8]):
+            idx = ImageSteganography._rgb_index(pixels, pos)
+            flat[idx] = (flat[idx] & 0xFE) | chunk
+
+    @staticmethod
+    def _rgb_index(pixels: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Flat indices into pixels of RGB value positions, skipping any alpha channel."""
+        if pixels.shape[1] == 3:
+            return positions
+        return positions + positions // 3 * (pixels.shape[1] - 3)
+
+    @staticmethod
+    def _extract_message(bits: np.ndarray) -> str:
+        """Reads bytes from a bit array up to the first null terminator."""
+        data = np.packbits(bits[:len(bits) - len(bits) % 8]).tobytes()
+        end = data.find(b'\x00')
+        return (data if end < 0 else data[:end]).decode('latin-1')
@@ -0,0 +1,28 @@
+import os
+
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.jpg', '.jpeg')
+AUDIO_EXTENSIONS = ('.wav', '.mp3')
+VIDEO_EXTENSIONS = ('.avi', '.mp4')
+
+# Saved lossily, so an image written with one of these loses its payload
+LOSSY_IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+
+def media_type(path: str) -> str:
+    """Returns 'image', 'audio' or 'video' based on the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return 'image'
+    if ext in AUDIO_EXTENSIONS:
+        return 'audio'
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    raise ValueError(f"Unsupported file type: {path}")
+
+def written_path(output_path: str, media: str) -> str:
+    """The path an engine actually writes when asked for output_path.
+
+    The video engine always writes FFV1 AVI, whatever extension was requested.
+    """
+    if media == 'video':
+        return os.path.splitext(output_path)[0] + '.avi'
+    return output_path
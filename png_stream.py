@@ -0,0 +1,268 @@
+import zlib
+import struct
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Colour types handled by the streaming path: 8-bit truecolour, with or without alpha
+_CHANNELS = {2: 3, 6: 4}
+
+class PrefixedStream:
+    """Replays bytes already read from a stream before reading on from it.
+
+    Lets a caller sniff the head of a non-seekable stream (such as stdin)
+    and still hand the whole stream to a reader.
+    """
+
+    def __init__(self, prefix: bytes, fp):
+        self.prefix = prefix
+        self.fp = fp
+        self.offset = 0
+
+    @property
+    def within_prefix(self) -> bool:
+        """True while nothing beyond the prefix has been consumed."""
+        return self.offset <= len(self.prefix)
+
+    def read(self, size: int = -1) -> bytes:
+        start = self.offset
+        head = self.prefix[start:] if size < 0 else self.prefix[start:start + size]
+        self.offset += len(head)
+        if size < 0:
+            rest = self.fp.read()
+        elif len(head) < size:
+            rest = self.fp.read(size - len(head))
+        else:
+            return head
+        self.offset += len(rest)
+        return head + rest
+
+class PNGReader:
+    """Streams the rows of an 8-bit, non-interlaced RGB or RGBA PNG from a file object.
+
+    Only as much of the compressed stream is inflated as the rows consumed so
+    far need, so reading the first rows of a very large image is cheap and
+    memory stays bounded regardless of the image size. Other PNG flavours
+    raise ValueError so that callers can fall back to PIL.
+    """
+
+    def __init__(self, fp, read_size: int = 1 << 20):
+        self.fp = fp
+        self.read_size = read_size
+        if fp.read(8) != PNG_SIGNATURE:
+            raise ValueError("Not a PNG file")
+
+        chunk_type, data = self._read_chunk()
+        if chunk_type != b'IHDR':
+            raise ValueError("PNG file does not start with IHDR")
+        (self.width, self.height, bit_depth, color_type,
+         _, _, interlace) = struct.unpack('>IIBBBBB', data)
+        if bit_depth != 8 or color_type not in _CHANNELS or interlace:
+            raise ValueError("Unsupported PNG flavour for streaming")
+        self.channels = _CHANNELS[color_type]
+        self.mode = 'RGB' if self.channels == 3 else 'RGBA'
+        self.stride = self.width * self.channels
+
+        # Ancillary chunks are kept so writers can pass them through
+        self.leading_chunks = []
+        self.trailing_chunks = []
+        while True:
+            length, chunk_type = self._read_header()
+            if chunk_type == b'IDAT':
+                break
+            data = self._read_body(length, chunk_type)
+            if chunk_type == b'IEND':
+                raise ValueError("PNG file has no image data")
+            self.leading_chunks.append((chunk_type, data))
+
+        # IDAT payloads are read piecewise, so one huge IDAT stays within read_size
+        self._idat_left = length
+        self._idat_crc = zlib.crc32(chunk_type)
+        if not length:
+            self._check_crc(self._idat_crc, chunk_type)
+        self._idat_done = False
+        self._ended = False
+        self._decompressor = zlib.decompressobj()
+        self._buffer = bytearray()
+
+    @property
+    def size(self) -> tuple:
+        return self.width, self.height
+
+    def _read_header(self) -> tuple:
+        header = self.fp.read(8)
+        if len(header) < 8:
+            raise ValueError("Truncated PNG file")
+        return struct.unpack('>I4s', header)
+
+    def _check_crc(self, crc: int, chunk_type: bytes) -> None:
+        stored = self.fp.read(4)
+        if len(stored) < 4:
+            raise ValueError("Truncated PNG file")
+        if crc != struct.unpack('>I', stored)[0]:
+            raise ValueError(f"Corrupt PNG chunk {chunk_type!r}")
+
+    def _read_body(self, length: int, chunk_type: bytes) -> bytes:
+        data = self.fp.read(length)
+        if len(data) < length:
+            raise ValueError("Truncated PNG file")
+        self._check_crc(zlib.crc32(chunk_type + data), chunk_type)
+        return data
+
+    def _read_chunk(self) -> tuple:
+        length, chunk_type = self._read_header()
+        return chunk_type, self._read_body(length, chunk_type)
+
+    def _read_idat(self) -> bytes:
+        """Returns up to read_size bytes of IDAT payload, or b'' once the image data ends."""
+        while not self._idat_left:
+            if self._idat_done:
+                return b''
+            length, chunk_type = self._read_header()
+            if chunk_type != b'IDAT':
+                self._idat_done = True
+                self._keep_trailing(chunk_type, self._read_body(length, chunk_type))
+                return b''
+            self._idat_left = length
+            self._idat_crc = zlib.crc32(chunk_type)
+            if not length:
+                self._check_crc(self._idat_crc, b'IDAT')
+
+        data = self.fp.read(min(self._idat_left, self.read_size))
+        if not data:
+            raise ValueError("Truncated PNG file")
+        self._idat_left -= len(data)
+        self._idat_crc = zlib.crc32(data, self._idat_crc)
+        if not self._idat_left:
+            self._check_crc(self._idat_crc, b'IDAT')
+        return data
+
+    def _fill(self) -> None:
+        """Inflates at most read_size more bytes of row data into the buffer."""
+        data = self._decompressor.unconsumed_tail
+        if not data:
+            data = self._read_idat()
+            if not data:
+                raise ValueError("Truncated PNG image data")
+        self._buffer += self._decompressor.decompress(data, self.read_size)
+
+    def _keep_trailing(self, chunk_type: bytes, data: bytes) -> None:
+        if chunk_type == b'IEND':
+            self._ended = True
+        else:
+            self.trailing_chunks.append((chunk_type, data))
+
+    def filtered_rows(self):
+        """Yields (filter type, filtered row bytes) for every row, in order."""
+        row_len = self.stride + 1
+        for _ in range(self.height):
+            while len(self._buffer) < row_len:
+                self._fill()
+            row = bytes(self._buffer[:row_len])
+            del self._buffer[:row_len]
+            yield row[0], row[1:]
+
+    def rows(self):
+        """Yields every row as a (width, channels) uint8 array."""
+        prev = np.zeros(self.stride, dtype=np.uint8)
+        for filter_type, row in self.filtered_rows():
+            prev = unfilter_row(filter_type, row, prev, self.channels)
+            yield prev.reshape(self.width, self.channels)
+
+    def finish(self) -> None:
+        """Reads up to IEND so that trailing_chunks is complete."""
+        while self._read_idat():
+            pass  # Rest of the image data, when not all rows were read
+        while not self._ended:
+            self._keep_trailing(*self._read_chunk())
+
+class PNGWriter:
+    """Writes an 8-bit RGB or RGBA PNG to a file object one row at a time.
+
+    Compressed data goes out as IDAT chunks of at most chunk_size bytes as
+    soon as it is available, so memory stays bounded and a streamed output
+    can be consumed while it is still being produced.
+    """
+
+    def __init__(self, fp, width: int, height: int, mode: str, leading_chunks: list = (),
+                 chunk_size: int = 1 << 16, level: int = 6):
+        if mode not in ('RGB', 'RGBA'):
+            raise ValueError(f"Unsupported image mode for streaming: {mode}")
+        self.fp = fp
+        self.width = width
+        self.height = height
+        self.channels = len(mode)
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(level)
+        self._pending = bytearray()
+
+        color_type = 2 if mode == 'RGB' else 6
+        fp.write(PNG_SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+        for chunk_type, data in leading_chunks:
+            self._write_chunk(chunk_type, data)
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes) -> None:
+        self.fp.write(struct.pack('>I', len(data)) + chunk_type + data
+                      + struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+    def _flush_idat(self, final: bool = False) -> None:
+        while len(self._pending) >= self.chunk_size or (final and self._pending):
+            self._write_chunk(b'IDAT', bytes(self._pending[:self.chunk_size]))
+            del self._pending[:self.chunk_size]
+            self.fp.flush()
+
+    def write_filtered_row(self, filter_type: int, row: bytes) -> None:
+        """Writes a row that is already filtered, e.g. passed through from a PNGReader."""
+        if self.rows_written >= self.height:
+            raise ValueError("Too many rows written to PNG")
+        self._pending += self._compressor.compress(bytes([filter_type]) + row)
+        self.rows_written += 1
+        self._flush_idat()
+
+    def write_row(self, pixels: np.ndarray) -> None:
+        """Writes a (width, channels) uint8 row using the Sub filter."""
+        raw = np.ascontiguousarray(pixels, dtype=np.uint8).reshape(-1)
+        filtered = raw.copy()
+        filtered[self.channels:] -= raw[:-self.channels]  # Wraps modulo 256
+        self.write_filtered_row(1, filtered.tobytes())
+
+    def close(self, trailing_chunks: list = ()) -> None:
+        if self.rows_written != self.height:
+            raise ValueError(f"Expected {self.height} PNG rows, got {self.rows_written}")
+        self._pending += self._compressor.flush()
+        self._flush_idat(final=True)
+        for chunk_type, data in trailing_chunks:
+            self._write_chunk(chunk_type, data)
+        self._write_chunk(b'IEND', b'')
+        self.fp.flush()
+
+def unfilter_row(filter_type: int, row: bytes, prev: np.ndarray, bpp: int) -> np.ndarray:
+    """Reverses a PNG row filter given the previous unfiltered row."""
+    cur = np.frombuffer(row, dtype=np.uint8)
+    if filter_type == 0:
+        return cur.copy()
+    if filter_type == 1:
+        # Sub is a running sum per channel, which wraps naturally in uint8
+        return np.cumsum(cur.reshape(-1, bpp), axis=0, dtype=np.uint8).reshape(-1)
+    if filter_type == 2:
+        return cur + prev
+    if filter_type not in (3, 4):
+        raise ValueError(f"Unknown PNG filter type {filter_type}")
+
+    # Average and Paeth depend on the pixel just decoded, so walk the row
+    out = bytearray(row)
+    up = prev.tobytes()
+    for i in range(len(out)):
+        a = out[i - bpp] if i >= bpp else 0
+        b = up[i]
+        if filter_type == 3:
+            out[i] = (out[i] + ((a + b) >> 1)) & 0xFF
+        else:
+            c = up[i - bpp] if i >= bpp else 0
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+            out[i] = (out[i] + pred) & 0xFF
+    return np.frombuffer(out, dtype=np.uint8)
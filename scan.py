@@ -0,0 +1,168 @@
+import os
+import csv
+import base64
+import sqlite3
+import string
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from image_stego import ImageSteganography
+from audio_stego import AudioSteganography
+from video_stego import VideoSteganography
+from media import media_type, IMAGE_EXTENSIONS, AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, LOSSY_IMAGE_EXTENSIONS
+from shard import SHARD_MAGIC
+
+_HANDLERS = {
+    'image': ImageSteganography,
+    'audio': AudioSteganography,
+    'video': VideoSteganography,
+}
+
+_PRINTABLE = frozenset(string.printable.encode())
+
+# Longest window read while chasing the end of a message that passed the signature check
+_MAX_SCAN_BITS = 1 << 16
+
+def _looks_like_payload(data: bytes, min_length: int) -> bool:
+    return len(data) >= min_length and all(byte in _PRINTABLE for byte in data)
+
+def _looks_encrypted(content: bytes, media: str) -> bool:
+    """Keyed engines store base64 ciphertext: AES blocks, or nonce + tag + data for video."""
+    try:
+        ciphertext = base64.b64decode(content, validate=True)
+    except ValueError:
+        return False
+    if media == 'video':
+        return len(ciphertext) > 32
+    return len(ciphertext) > 0 and len(ciphertext) % 16 == 0
+
+def _flags(content: bytes, media: str, complete: bool) -> str:
+    flags = []
+    if content.startswith(SHARD_MAGIC.encode() + b'|'):
+        flags.append('sharded')
+    elif complete and _looks_encrypted(content, media):
+        flags.append('encrypted')
+    if not complete:
+        flags.append('truncated')
+    return ','.join(flags)
+
+def scan_file(path: str, n_bits: int = 512, min_length: int = 4):
+    """Checks the leading carrier bits of one file for this tool's payload framing.
+
+    Image and audio payloads are a run of printable bytes ending in a null
+    terminator (audio is tried in both the byte and the sample-LSB layout);
+    video payloads start with a 64-bit length header. Returns
+    (path, media_type, payload_length, flags), or None when the file carries
+    no payload or cannot be read. payload_length is None when the message
+    runs past the longest window read. JPEGs are skipped without being
+    decoded, since lossy compression destroys any LSB payload.
+    """
+    if path.lower().endswith(LOSSY_IMAGE_EXTENSIONS):
+        return None
+    try:
+        media = media_type(path)
+        handler = _HANDLERS[media]
+
+        if media == 'video':
+            bits = handler._peek_bits(path, n_bits)
+            if len(bits) < 64:
+                return None
+            msg_length = int.from_bytes(np.packbits(bits[:64]).tobytes(), 'big')
+            if msg_length == 0 or msg_length % 8 or msg_length >= 1 << 40:
+                return None
+            content_bits = bits[64:64 + msg_length]
+            content = np.packbits(content_bits[:len(content_bits) - len(content_bits) % 8]).tobytes()
+            if not _looks_like_payload(content, min(min_length, msg_length // 8)):
+                return None
+            return path, media, msg_length // 8, _flags(content, media, True)
+
+        row = _scan_terminated(path, media, lambda n: handler._peek_bits(path, n), n_bits, min_length)
+        if row is None and media == 'audio':
+            # Sample-width-aware layout: only the true sample LSBs carry bits
+            row = _scan_terminated(path, media, lambda n: handler._peek_bits(path, n, sample_lsb=True),
+                                   n_bits, min_length)
+            if row is not None:
+                row = row[:3] + (','.join(filter(None, [row[3], 'sample_lsb'])),)
+        return row
+    except Exception:
+        return None
+
+def _scan_terminated(path: str, media: str, peek, n_bits: int, min_length: int):
+    """Checks for a printable, null-terminated message; peek(n) returns the first n LSBs."""
+    bits = peek(n_bits)
+    while True:
+        data = np.packbits(bits[:len(bits) - len(bits) % 8]).tobytes()
+        end = data.find(b'\x00')
+        content = data if end < 0 else data[:end]
+        if not _looks_like_payload(content, min_length):
+            return None
+        if end >= 0:
+            return path, media, len(content), _flags(content, media, True)
+        # Still printable at the end of the window: read further, but only
+        # for files that already look like they carry a payload
+        if n_bits >= _MAX_SCAN_BITS or len(bits) < n_bits:
+            return path, media, None, _flags(content, media, False)
+        n_bits *= 4
+        bits = peek(n_bits)
+
+def _iter_media_files(paths: list):
+    extensions = tuple(ext for ext in IMAGE_EXTENSIONS + AUDIO_EXTENSIONS + VIDEO_EXTENSIONS
+                       if ext not in LOSSY_IMAGE_EXTENSIONS)
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if name.lower().endswith(extensions):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+def _scan_batch(paths: list, n_bits: int) -> list:
+    return [row for row in (scan_file(path, n_bits) for path in paths) if row]
+
+def _scan_results(paths: list, n_bits: int, workers: int, batch_size: int = 256):
+    """Yields hits, keeping only a bounded number of batches in flight."""
+    max_pending = (workers or os.cpu_count() or 1) * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        batch = []
+        for path in _iter_media_files(paths):
+            batch.append(path)
+            if len(batch) == batch_size:
+                pending.add(pool.submit(_scan_batch, batch, n_bits))
+                batch = []
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        if batch:
+            pending.add(pool.submit(_scan_batch, batch, n_bits))
+        for future in as_completed(pending):
+            yield from future.result()
+
+def scan(paths: list, index_path: str, n_bits: int = 512, workers: int = None) -> int:
+    """Scans files and directories in a process pool and writes an index of hits.
+
+    The index is a SQLite database when index_path ends in .db, .sqlite or
+    .sqlite3, and CSV otherwise. Returns the number of payload-bearing files.
+    """
+    hits = 0
+    if index_path.endswith(('.db', '.sqlite', '.sqlite3')):
+        conn = sqlite3.connect(index_path)
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS stego_index ("
+                         "path TEXT PRIMARY KEY, media_type TEXT, "
+                         "payload_length INTEGER, flags TEXT)")
+            for row in _scan_results(paths, n_bits, workers):
+                conn.execute("INSERT OR REPLACE INTO stego_index VALUES (?, ?, ?, ?)", row)
+                hits += 1
+            conn.commit()
+        finally:
+            conn.close()
+    else:
+        with open(index_path, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(['path', 'media_type', 'payload_length', 'flags'])
+            for row in _scan_results(paths, n_bits, workers):
+                writer.writerow(row)
+                hits += 1
+    return hits
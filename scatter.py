@@ -0,0 +1,104 @@
+import hashlib
+import numpy as np
+
+# Positions generated per step; a multiple of 8 so chunks hold whole bytes
+SCATTER_CHUNK = 1 << 16
+
+class KeyedScatter:
+    """Key-dependent embedding positions spread over carrier slots [0, size).
+
+    A scattered payload is a 64-bit length header followed by the message
+    bits. Each bit is given its own stratum of consecutive slots and lands on
+    a slot within it drawn from a NumPy Generator seeded by the key: the
+    header, masked with key bits, in 64 strata over a small leading region,
+    and the message in as many strata as it has bits over the rest of the
+    carrier. Positions therefore come out in increasing order, a chunk at a
+    time, so a carrier is written and read front to back at close to the
+    cost of sequential embedding, and no permutation is ever built.
+    """
+
+    HEADER_BITS = 64
+
+    def __init__(self, key: str, size: int):
+        if not key:
+            raise ValueError("Keyed scatter needs a key.")
+        self.size = size
+        self.region = max(self.HEADER_BITS, min(1 << 16, size // 256))
+        if size <= self.region:
+            raise ValueError("Carrier has no capacity.")
+        self.seed = int.from_bytes(hashlib.sha256(b'stego-scatter:' + key.encode()).digest(), 'big')
+        rng = np.random.default_rng([self.seed, 0])
+        self.header = self._strata(rng, 0, self.HEADER_BITS, self.HEADER_BITS, 0, self.region)
+        self.header_mask = rng.integers(0, 2, self.HEADER_BITS, dtype=np.uint8)
+
+    @property
+    def capacity(self) -> int:
+        """Message bits that fit after the header region."""
+        return self.size - self.region
+
+    @staticmethod
+    def _strata(rng: np.random.Generator, first: int, count: int, n: int,
+                base: int, length: int) -> np.ndarray:
+        """Random slots for strata first .. first + count - 1 of n splitting [base, base + length).
+
+        The first length % n strata are one slot longer than the rest.
+        """
+        q, rem = divmod(length, n)
+        positions = np.empty(count, dtype=np.intp)
+        split = min(max(rem - first, 0), count)
+        for lo, hi, size, start in ((0, split, q + 1, base + first * (q + 1)),
+                                    (split, count, q, base + (first + split) * q + rem)):
+            if lo < hi:
+                part = positions[lo:hi]
+                part[:] = KeyedScatter._offsets(rng, hi - lo, size)
+                part += np.arange(start, start + (hi - lo) * size, size)
+        return positions
+
+    @staticmethod
+    def _offsets(rng: np.random.Generator, count: int, size: int) -> np.ndarray:
+        """count random offsets below size.
+
+        Strata of up to 2**16 slots, i.e. any message using more than a
+        65536th of the carrier, scale 16-bit fractions taken four to a raw
+        64-bit draw; this is what keeps dense embedding cheap.
+        """
+        if size == 1:
+            return np.zeros(count, dtype=np.intp)
+        if size > 1 << 16:
+            return rng.integers(0, size, count)
+        words = np.asarray(rng.bit_generator.random_raw(-(-count // 4)), dtype='<u8')
+        fractions = words.view('<u2')[:count].astype(np.uint32)
+        fractions *= size
+        fractions >>= 16
+        return fractions
+
+    def chunks(self, count: int):
+        """Yields (start, positions) covering count message bits, positions increasing."""
+        if count > self.capacity:
+            raise ValueError("Message too large for the carrier.")
+        rng = np.random.default_rng([self.seed, 1])
+        for start in range(0, count, SCATTER_CHUNK):
+            n = min(SCATTER_CHUNK, count - start)
+            yield start, self._strata(rng, start, n, count, self.region, self.capacity)
+
+    def placements(self, bits: np.ndarray):
+        """Yields (positions, bits) to write for a message: the header, then each chunk."""
+        header = np.unpackbits(np.array([len(bits)], dtype='>u8').view(np.uint8))
+        yield self.header, header ^ self.header_mask
+        for start, positions in self.chunks(len(bits)):
+            yield positions, bits[start:start + len(positions)]
+
+    def read_message(self, read_bits) -> bytes:
+        """Reads a scattered payload back as bytes.
+
+        read_bits maps an array of positions to the LSBs stored there; it is
+        called with increasing positions throughout.
+        """
+        header = read_bits(self.header) ^ self.header_mask
+        n_bits = int.from_bytes(np.packbits(header).tobytes(), 'big')
+        if n_bits > self.capacity or n_bits % 8:
+            raise ValueError("No scattered message found for this key.")
+        data = bytearray()
+        for _, positions in self.chunks(n_bits):
+            data += np.packbits(read_bits(positions)).tobytes()
+        return bytes(data)
@@ -0,0 +1,149 @@
+import os
+import base64
+from concurrent.futures import ProcessPoolExecutor
+from image_stego import ImageSteganography
+from audio_stego import AudioSteganography
+from video_stego import VideoSteganography
+from media import media_type, written_path, LOSSY_IMAGE_EXTENSIONS
+
+SHARD_MAGIC = "STGSHARD"
+
+_HANDLERS = {
+    'image': ImageSteganography,
+    'audio': AudioSteganography,
+    'video': VideoSteganography,
+}
+
+def _capacity(path: str) -> int:
+    return _HANDLERS[media_type(path)].capacity(path)
+
+def _encode_shard(carrier_path: str, shard: str, output_path: str) -> str:
+    _HANDLERS[media_type(carrier_path)].encode(carrier_path, shard, output_path)
+    return output_path
+
+def _decode_shard(path: str):
+    """Returns (payload_id, seq, total, chunk) or None if path holds no shard."""
+    try:
+        message = _HANDLERS[media_type(path)].decode(path)
+    except Exception:
+        return None
+    fields = message.split('|')
+    if len(fields) != 5 or fields[0] != SHARD_MAGIC:
+        return None
+    try:
+        return fields[1], int(fields[2]), int(fields[3]), base64.b64decode(fields[4])
+    except ValueError:
+        return None
+
+class ShardedSteganography:
+    """Splits one payload into sequenced shards spread over a pool of carriers.
+
+    Each shard is an ordinary message of the form
+    ``STGSHARD|<payload id>|<seq>|<total>|<base64 chunk>``, so every carrier
+    stays decodable by its own engine. The payload is encrypted once as a
+    whole (AES-EAX, as for video) before it is split, and the shards are
+    embedded without a per-carrier key.
+    """
+
+    @staticmethod
+    def _output_path(carrier_path: str, output_dir: str) -> str:
+        name, ext = os.path.splitext(os.path.basename(carrier_path))
+        # Shards must survive being saved: the audio engine always writes WAV,
+        # and a JPEG output would destroy the LSBs, so those are stored as PNG
+        if ext.lower() in LOSSY_IMAGE_EXTENSIONS:
+            ext = '.png'
+        ext = {'.mp3': '.wav'}.get(ext.lower(), ext)
+        return written_path(os.path.join(output_dir, name + ext), media_type(carrier_path))
+
+    @staticmethod
+    def plan(payload: bytes, carrier_paths: list, workers: int = None) -> list:
+        """Picks carriers, largest first, until the payload fits; returns (path, chunk) pairs."""
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            capacities = list(pool.map(_capacity, carrier_paths))
+
+        payload_id = os.urandom(4).hex()
+        digits = len(str(len(carrier_paths)))
+        header_len = len(f"{SHARD_MAGIC}|{payload_id}|{'9' * digits}|{'9' * digits}|")
+
+        assignments = []
+        offset = 0
+        ranked = sorted(zip(capacities, carrier_paths), key=lambda item: item[0], reverse=True)
+        for capacity, path in ranked:
+            if offset >= len(payload) and assignments:
+                break
+            chunk_size = (capacity - header_len) // 4 * 3  # base64 expansion
+            if chunk_size <= 0:
+                continue
+            assignments.append((path, payload[offset:offset + chunk_size]))
+            offset += chunk_size
+
+        if offset < len(payload):
+            total = sum(max(0, (c - header_len) // 4 * 3) for c in capacities)
+            raise ValueError(f"Message too large for the carrier pool ({len(payload)}/{total} bytes)")
+
+        total = len(assignments)
+        return [(path, f"{SHARD_MAGIC}|{payload_id}|{seq}|{total}|{base64.b64encode(chunk).decode()}")
+                for seq, (path, chunk) in enumerate(assignments)]
+
+    @staticmethod
+    def encode(carrier_paths: list, message: str, output_dir: str, key: str = None,
+               workers: int = None) -> list:
+        """Shards a message across carriers and encodes the shards in parallel.
+
+        Returns the output paths written, one per carrier actually used.
+        """
+        for path in carrier_paths:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Error: Carrier file does not exist: {path}")
+
+        payload = message.encode()
+        if key:
+            payload = base64.b64decode(VideoSteganography.encrypt_message(key, message))
+
+        shards = ShardedSteganography.plan(payload, carrier_paths, workers)
+        output_paths = [ShardedSteganography._output_path(path, output_dir) for path, _ in shards]
+        if len(set(output_paths)) != len(output_paths):
+            raise ValueError("Carriers must have distinct file names.")
+        for path in output_paths:
+            # The engines would append to an existing message
+            if os.path.exists(path):
+                raise FileExistsError(f"Error: Output file already exists: {path}")
+
+        os.makedirs(output_dir, exist_ok=True)
+        carriers = [path for path, _ in shards]
+        messages = [shard for _, shard in shards]
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(_encode_shard, carriers, messages, output_paths))
+        except Exception:
+            # A partial set of shards is useless and would block a retry
+            for path in output_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+
+    @staticmethod
+    def decode(paths: list, key: str = None, workers: int = None) -> str:
+        """Decodes shards in parallel and reassembles them in sequence order.
+
+        Paths may be given in any order; files that carry no shard are ignored.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = [shard for shard in pool.map(_decode_shard, paths) if shard]
+        if not shards:
+            raise ValueError("No shards found.")
+
+        payload_ids = {shard[0] for shard in shards}
+        if len(payload_ids) > 1:
+            raise ValueError(f"Shards from {len(payload_ids)} different payloads found.")
+
+        total = shards[0][2]
+        chunks = {seq: chunk for _, seq, _, chunk in shards}
+        missing = [seq for seq in range(total) if seq not in chunks]
+        if missing:
+            raise ValueError(f"Missing shards: {missing}")
+
+        payload = b''.join(chunks[seq] for seq in range(total))
+        if key:
+            return VideoSteganography.decrypt_message(key, base64.b64encode(payload).decode())
+        return payload.decode()
@@ -4,6 +4,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from audio_stego import AudioSteganography
+import numpy as np
+import wave
+import io
 import unittest
 
 class TestAudioSteganography(unittest.TestCase):
@@ -37,6 +40,38 @@ class TestAudioSteganography(unittest.TestCase):
         decoded_message = AudioSteganography.decode(self.encoded_audio)
         self.assertEqual(self.message, decoded_message)
 
+    def test_scatter_encode_decode(self):
+        # Keyed scatter order must round-trip with the same key
+        key = "0123456789abcdef"
+        AudioSteganography.encode(self.test_audio, self.message, self.encoded_audio, key, scatter=True)
+        decoded_message = AudioSteganography.decode(self.encoded_audio, key, scatter=True)
+        self.assertEqual(self.message, decoded_message)
+
+    def test_sample_lsb_encode_decode(self):
+        # Only the least significant bit of each sample may change
+        AudioSteganography.encode(self.test_audio, self.message, self.encoded_audio, sample_lsb=True)
+        decoded_message = AudioSteganography.decode(self.encoded_audio, sample_lsb=True)
+        self.assertEqual(self.message, decoded_message)
+
+        with wave.open(self.test_audio, 'rb') as original, wave.open(self.encoded_audio, 'rb') as encoded:
+            sampwidth = original.getsampwidth()
+            before = np.frombuffer(original.readframes(original.getnframes()), dtype=np.uint8)
+            after = np.frombuffer(encoded.readframes(encoded.getnframes()), dtype=np.uint8)
+        changed = (before ^ after).reshape(-1, sampwidth)
+        self.assertTrue((changed[:, 0] <= 1).all())
+        self.assertFalse(changed[:, 1:].any())
+
+    def test_stream_encode_decode(self):
+        # Pipe mode reads the carrier and payload from streams and writes WAV to a stream
+        output = io.BytesIO()
+        with open(self.test_audio, 'rb') as src:
+            AudioSteganography.encode_stream(src, io.BytesIO(self.message.encode()), output, chunk_frames=4)
+        self.assertEqual(self.message, AudioSteganography.decode_stream(io.BytesIO(output.getvalue())))
+
+        AudioSteganography.encode(self.test_audio, self.message, self.encoded_audio)
+        with open(self.encoded_audio, 'rb') as encoded:
+            self.assertEqual(encoded.read(), output.getvalue())
+
     def tearDown(self):
         if os.path.exists(self.encoded_audio):
             os.remove(self.encoded_audio)
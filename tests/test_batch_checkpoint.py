@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_checkpoint import BatchCheckpoint
+import hashlib
+import unittest
+
+class TestBatchCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.checkpoint_path = "tests/batch_checkpoint.jsonl"
+        self.input_file = "tests/checkpoint_input.bin"
+        self.output_file = "tests/checkpoint_output.bin"
+        with open(self.input_file, 'wb') as fh:
+            fh.write(b"carrier")
+        with open(self.output_file, 'wb') as fh:
+            fh.write(b"stego")
+        self.checkpoint = BatchCheckpoint(self.checkpoint_path)
+        self.payload = self.checkpoint.secret_hash("Secret Message")
+        self.options = self.checkpoint.options_hash(handler="ImageSteganography", key="")
+
+    def record_done(self):
+        input_hash = BatchCheckpoint.file_hash(self.input_file)
+        self.checkpoint.record(self.input_file, self.output_file, self.payload, self.options, input_hash)
+
+    def test_done_item_is_skipped_on_rerun(self):
+        self.record_done()
+        checkpoint = BatchCheckpoint(self.checkpoint_path)
+        self.assertTrue(checkpoint.is_done(self.input_file, self.output_file, self.payload, self.options))
+
+    def test_changed_payload_or_options_is_redone(self):
+        self.record_done()
+        checkpoint = BatchCheckpoint(self.checkpoint_path)
+        other_payload = checkpoint.secret_hash("Other Message")
+        other_options = checkpoint.options_hash(handler="ImageSteganography", key="k" * 16)
+        self.assertFalse(checkpoint.is_done(self.input_file, self.output_file, other_payload, self.options))
+        self.assertFalse(checkpoint.is_done(self.input_file, self.output_file, self.payload, other_options))
+
+    def test_touched_input_falls_back_to_content_hash(self):
+        self.record_done()
+        st = os.stat(self.input_file)
+        os.utime(self.input_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        checkpoint = BatchCheckpoint(self.checkpoint_path)
+        self.assertTrue(checkpoint.is_done(self.input_file, self.output_file, self.payload, self.options))
+
+        with open(self.input_file, 'wb') as fh:
+            fh.write(b"different carrier")
+        self.assertFalse(checkpoint.is_done(self.input_file, self.output_file, self.payload, self.options))
+
+    def test_fingerprints_are_salted_per_checkpoint(self):
+        # Reloading keeps the salt; another checkpoint file gets its own
+        self.record_done()
+        reloaded = BatchCheckpoint(self.checkpoint_path)
+        self.assertEqual(self.options, reloaded.options_hash(handler="ImageSteganography", key=""))
+
+        other = BatchCheckpoint("tests/other_checkpoint.jsonl")
+        self.assertNotEqual(self.payload, other.secret_hash("Secret Message"))
+        with open(self.checkpoint_path, encoding='utf-8') as fh:
+            self.assertNotIn(hashlib.sha256(b"Secret Message").hexdigest(), fh.read())
+
+    def test_failed_item_is_retried(self):
+        checkpoint = self.checkpoint
+        checkpoint.record(self.input_file, self.output_file, self.payload, self.options, None, error="bad file")
+        checkpoint = BatchCheckpoint(self.checkpoint_path)
+        self.assertFalse(checkpoint.is_done(self.input_file, self.output_file, self.payload, self.options))
+
+        self.record_done()
+        checkpoint = BatchCheckpoint(self.checkpoint_path)
+        self.assertTrue(checkpoint.is_done(self.input_file, self.output_file, self.payload, self.options))
+
+    def tearDown(self):
+        for path in (self.checkpoint_path, self.input_file, self.output_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import sys
+import os
+import shutil
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import carrier_cache
+from carrier_cache import CarrierCache
+from image_stego import ImageSteganography
+from audio_stego import AudioSteganography
+from video_stego import VideoSteganography, _CachedCapture
+from unittest import mock
+import numpy as np
+import unittest
+
+class TestCarrierCache(unittest.TestCase):
+    def setUp(self):
+        self.test_image = "tests/test_image.png"  # Path to test image
+        self.test_audio = "tests/test_audio.wav"  # Path to test audio
+        self.test_video = "tests/test_video.avi"  # Path to test video
+        self.encoded_image = "tests/encoded_image.png"
+        self.encoded_audio = "tests/encoded_audio.wav"
+        self.spill_dir = "tests/cache_spill"
+        self.message = "Secret Message"
+
+    def test_lru_eviction_and_spill(self):
+        cache = CarrierCache(max_bytes=150, spill_dir=self.spill_dir)
+        first, second = np.arange(100, dtype=np.uint8), np.arange(100, dtype=np.uint8)[::-1].copy()
+        cache.put(self.test_image, 'a', 'meta-a', first)
+        cache.put(self.test_audio, 'b', 'meta-b', second)
+
+        # The least recently used entry moved to disk and comes back as a memmap
+        meta, spilled = cache.get(self.test_image, 'a')
+        self.assertEqual('meta-a', meta)
+        self.assertIsInstance(spilled, np.memmap)
+        self.assertTrue((spilled == np.arange(100)).all())
+        self.assertEqual(100, cache.used_bytes)
+        self.assertFalse(cache.get(self.test_audio, 'b')[1].flags.writeable)
+
+        cache.clear()
+        self.assertEqual([], os.listdir(self.spill_dir))
+
+    def test_without_spill_evicted_entries_are_dropped(self):
+        cache = CarrierCache(max_bytes=150)
+        cache.put(self.test_image, 'a', None, np.zeros(100, dtype=np.uint8))
+        cache.put(self.test_audio, 'b', None, np.zeros(100, dtype=np.uint8))
+        self.assertIsNone(cache.get(self.test_image, 'a'))
+        self.assertIsNotNone(cache.get(self.test_audio, 'b'))
+
+    def test_image_operations_decode_once(self):
+        carrier_cache.enable()
+        with mock.patch.object(ImageSteganography, '_load_pixels',
+                               wraps=ImageSteganography._load_pixels) as load:
+            ImageSteganography.capacity(self.test_image)
+            ImageSteganography.encode(self.test_image, self.message, self.encoded_image)
+            self.assertEqual(self.message, ImageSteganography.decode(self.encoded_image))
+            ImageSteganography.encode(self.test_image, self.message, "tests/encoded_image_2.png")
+        self.assertEqual(1, load.call_count)
+        os.remove("tests/encoded_image_2.png")
+
+    def test_audio_operations_decode_once(self):
+        carrier_cache.enable()
+        with mock.patch('wave.open', wraps=__import__('wave').open) as wave_open:
+            AudioSteganography.encode(self.test_audio, self.message, self.encoded_audio)
+            self.assertEqual(self.message, AudioSteganography.decode(self.encoded_audio))
+        # One read of the cover and one write of the output
+        self.assertEqual(2, wave_open.call_count)
+
+    def test_video_over_budget_is_not_decoded_ahead(self):
+        # Without a spill directory, an oversized video is read from the file as usual
+        cache = carrier_cache.enable(max_bytes=1000)
+        cap = VideoSteganography._open_capture(self.test_video)
+        self.assertNotIsInstance(cap, _CachedCapture)
+        cap.release()
+        self.assertEqual(0, cache.used_bytes)
+        self.assertIsNone(cache.get(self.test_video, 'video'))
+
+    def test_video_over_budget_decodes_into_spill_file(self):
+        cache = carrier_cache.enable(max_bytes=1000, spill_dir=self.spill_dir)
+        VideoSteganography._open_capture(self.test_video).release()
+        self.assertEqual(1, len(os.listdir(self.spill_dir)))
+        self.assertEqual(0, cache.used_bytes)
+
+        _, frames = cache.get(self.test_video, 'video')
+        self.assertIsInstance(frames, np.memmap)
+        cap = VideoSteganography._open_capture(self.test_video)
+        self.assertIsInstance(cap, _CachedCapture)
+        self.assertTrue((cap.read()[1] == frames[0]).all())
+        cap.release()
+
+    def test_missing_video_fails_as_without_cache(self):
+        carrier_cache.enable()
+        with self.assertRaisesRegex(ValueError, "Could not open video file"):
+            VideoSteganography.decode("tests/missing_video.avi")
+
+    def tearDown(self):
+        carrier_cache.disable()
+        for path in (self.encoded_image, self.encoded_audio):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
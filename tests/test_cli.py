@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cli import run_command
+import unittest
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.carriers = {'image': "tests/test_image.png", 'audio': "tests/test_audio.wav"}
+        self.encoded = {'image': "tests/encoded_pipe.png", 'audio': "tests/encoded_pipe.wav"}
+        self.decoded = "tests/decoded_pipe.txt"
+
+    def test_pipe_round_trip_non_ascii(self):
+        # The decoded payload is the UTF-8 bytes of the message, keyed or not
+        for media in self.carriers:
+            for message in ("héllo", "日本"):
+                for key in (None, "0123456789abcdef"):
+                    key_args = ['--key', key] if key else []
+                    run_command(['pipe', media, 'encode', '--input', self.carriers[media],
+                                 '--output', self.encoded[media], '--message', message] + key_args)
+                    run_command(['pipe', media, 'decode', '--input', self.encoded[media],
+                                 '--output', self.decoded] + key_args)
+                    with open(self.decoded, 'rb') as f:
+                        self.assertEqual(message.encode(), f.read(), (media, message, key))
+
+    def tearDown(self):
+        for path in list(self.encoded.values()) + [self.decoded]:
+            if os.path.exists(path):
+                os.remove(path)
+
+if __name__ == "__main__":
+    unittest.main()
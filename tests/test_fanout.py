@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fanout import FanOutEncoder
+from image_stego import ImageSteganography
+import unittest
+
+class TestFanOutEncoder(unittest.TestCase):
+    def setUp(self):
+        self.test_image = "tests/test_image.png"  # Path to test image
+        self.messages = [f"Recipient {i}" for i in range(4)]
+        self.outputs = [f"tests/fanout_{i}.png" for i in range(4)]
+
+    def test_encode_many(self):
+        with FanOutEncoder(self.test_image) as encoder:
+            written = encoder.encode_many(self.messages, self.outputs, workers=2)
+        self.assertEqual(self.outputs, written)
+        for message, output in zip(self.messages, self.outputs):
+            self.assertEqual(message, ImageSteganography.decode(output))
+
+    def test_message_too_large(self):
+        with FanOutEncoder(self.test_image) as encoder:
+            with self.assertRaises(ValueError):
+                encoder.encode_many(["x" * 10**8], self.outputs[:1])
+
+    def tearDown(self):
+        for output in self.outputs:
+            if os.path.exists(output):
+                os.remove(output)
+
+if __name__ == "__main__":
+    unittest.main()
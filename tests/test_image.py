@@ -3,6 +3,10 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from image_stego import ImageSteganography
+from png_stream import PNGReader, PNGWriter
+from PIL import Image
+import numpy as np
+import io
 import unittest
 
 class TestImageSteganography(unittest.TestCase):
@@ -36,6 +40,109 @@ class TestImageSteganography(unittest.TestCase):
         decoded_message = ImageSteganography.decode(self.encoded_image)
         self.assertEqual(self.message, decoded_message)
 
+    def test_non_latin1_message(self):
+        # Unkeyed text is stored a byte per character; a key allows any text
+        with self.assertRaises(ValueError):
+            ImageSteganography.encode(self.test_image, "日本", self.encoded_image)
+        key = "0123456789abcdef"
+        ImageSteganography.encode(self.test_image, "日本", self.encoded_image, key)
+        self.assertEqual("日本", ImageSteganography.decode(self.encoded_image, key))
+
+    def test_tiled_encode_decode(self):
+        # Bounded-memory mode must produce the same pixels as the in-memory path
+        budget = 4 << 20
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image, memory_budget=budget)
+        self.assertEqual(self.message, ImageSteganography.decode(self.encoded_image, memory_budget=budget))
+        self.assertEqual(self.message, ImageSteganography.decode(self.encoded_image))
+
+        tiled_pixels = np.array(Image.open(self.encoded_image))
+        os.remove(self.encoded_image)
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image)
+        self.assertTrue((tiled_pixels == np.array(Image.open(self.encoded_image))).all())
+
+    def test_tiled_append_data(self):
+        budget = 4 << 20
+        existing_message = "Existing Message"
+        ImageSteganography.encode(self.test_image, existing_message, self.encoded_image, memory_budget=budget)
+        ImageSteganography.encode(self.encoded_image, self.message, self.encoded_image, memory_budget=budget)
+        decoded_message = ImageSteganography.decode(self.encoded_image, memory_budget=budget)
+        self.assertEqual(f"{existing_message}\n{self.message}", decoded_message)
+
+    def test_png_reader_single_idat(self):
+        # One IDAT holding the whole image is read in read_size pieces, CRC included
+        pixels = np.array(Image.open(self.test_image).convert('RGB'))
+        output = io.BytesIO()
+        writer = PNGWriter(output, pixels.shape[1], pixels.shape[0], 'RGB', chunk_size=1 << 30)
+        for row in pixels:
+            writer.write_row(row)
+        writer.close()
+
+        reader = PNGReader(io.BytesIO(output.getvalue()), read_size=4096)
+        self.assertTrue((np.stack(list(reader.rows())) == pixels).all())
+        reader.finish()
+
+        corrupt = bytearray(output.getvalue())
+        corrupt[-14] ^= 0xFF  # The IDAT CRC, just before the 12-byte IEND chunk
+        reader = PNGReader(io.BytesIO(bytes(corrupt)), read_size=4096)
+        with self.assertRaises(ValueError):
+            list(reader.rows())
+            reader.finish()
+
+    def test_tiled_strip_formats(self):
+        # BMP and uncompressed TIFF are read in several strips and must match the in-memory path
+        budget = 5 << 18
+        carrier = np.random.default_rng(0).integers(0, 256, (200, 1000, 3), dtype=np.uint8)
+        message = "S" * 30000  # Spans several strips
+        for ext in ('.bmp', '.tif'):
+            carrier_path = "tests/strip_carrier" + ext
+            encoded_path = "tests/strip_encoded" + ext
+            Image.fromarray(carrier).save(carrier_path)
+            try:
+                ImageSteganography.encode(carrier_path, message, self.encoded_image, memory_budget=budget)
+                tiled_pixels = np.array(Image.open(self.encoded_image))
+                os.remove(self.encoded_image)
+                ImageSteganography.encode(carrier_path, message, self.encoded_image)
+                self.assertTrue((tiled_pixels == np.array(Image.open(self.encoded_image))).all())
+                os.remove(self.encoded_image)
+
+                # Decoding reads the stego BMP/TIFF itself in strips
+                ImageSteganography.encode(carrier_path, message, encoded_path)
+                self.assertEqual(message, ImageSteganography.decode(encoded_path, memory_budget=budget))
+            finally:
+                for path in (carrier_path, encoded_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def test_tiled_over_budget_raises(self):
+        # Compressed non-PNG inputs are decoded whole, so they must fit the budget
+        carrier_path = "tests/budget_carrier.jpg"
+        Image.fromarray(np.zeros((700, 700, 3), dtype=np.uint8)).save(carrier_path)
+        try:
+            with self.assertRaises(ValueError):
+                ImageSteganography.encode(carrier_path, self.message, self.encoded_image, memory_budget=5 << 18)
+        finally:
+            os.remove(carrier_path)
+
+    def test_scatter_encode_decode(self):
+        # Keyed scatter order must round-trip with the same key
+        key = "0123456789abcdef"
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image, key, scatter=True)
+        decoded_message = ImageSteganography.decode(self.encoded_image, key, scatter=True)
+        self.assertEqual(self.message, decoded_message)
+        with self.assertRaises(ValueError):
+            ImageSteganography.decode(self.encoded_image, "fedcba9876543210", scatter=True)
+
+    def test_stream_encode_decode(self):
+        # Pipe mode reads the carrier and payload from streams and writes PNG to a stream
+        output = io.BytesIO()
+        with open(self.test_image, 'rb') as src:
+            ImageSteganography.encode_stream(src, io.BytesIO(self.message.encode()), output)
+        self.assertEqual(self.message, ImageSteganography.decode_stream(io.BytesIO(output.getvalue())))
+
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image)
+        streamed = np.array(Image.open(io.BytesIO(output.getvalue())))
+        self.assertTrue((np.array(Image.open(self.encoded_image)) == streamed).all())
+
     def tearDown(self):
         if os.path.exists(self.encoded_image):
             os.remove(self.encoded_image)
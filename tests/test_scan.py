@@ -0,0 +1,53 @@
+import sys
+import os
+import csv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_stego import ImageSteganography
+from scan import scan, scan_file
+import unittest
+
+class TestScan(unittest.TestCase):
+    def setUp(self):
+        self.test_image = "tests/test_image.png"  # Path to test image
+        self.encoded_image = "tests/encoded_image.png"
+        self.index = "tests/scan_index.csv"
+        self.message = "Secret Message"
+
+    def test_scan_file(self):
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image)
+        self.assertEqual((self.encoded_image, 'image', len(self.message), ''),
+                         scan_file(self.encoded_image))
+
+    def test_scan_file_encrypted(self):
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image, "k" * 16)
+        self.assertEqual('encrypted', scan_file(self.encoded_image)[3])
+
+    def test_scan_file_raw_and_lossy_images(self):
+        # BMP is peeked from its leading rows; JPEG is skipped outright
+        for ext, expected in (('.bmp', len(self.message)), ('.jpg', None)):
+            path = "tests/scan_carrier" + ext
+            try:
+                ImageSteganography.encode(self.test_image, self.message, path)
+                row = scan_file(path)
+                self.assertEqual(expected, row and row[2])
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_scan_writes_index(self):
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image)
+        hits = scan([self.encoded_image], self.index, workers=1)
+        self.assertEqual(1, hits)
+        with open(self.index, newline='') as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertEqual(self.encoded_image, rows[0]['path'])
+        self.assertEqual(str(len(self.message)), rows[0]['payload_length'])
+
+    def tearDown(self):
+        for path in (self.encoded_image, self.index):
+            if os.path.exists(path):
+                os.remove(path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import os
+import shutil
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shard import ShardedSteganography
+from image_stego import ImageSteganography
+from PIL import Image
+import unittest
+
+class TestShardedSteganography(unittest.TestCase):
+    def setUp(self):
+        self.test_image = "tests/test_image.png"  # Path to test image
+        self.carriers = [f"tests/shard_carrier_{i}.png" for i in range(3)]
+        for carrier in self.carriers:
+            shutil.copy(self.test_image, carrier)
+        self.output_dir = "tests/shard_output"
+        # Too large for any single carrier
+        self.message = "S" * ImageSteganography.capacity(self.test_image)
+
+    def test_encode_decode(self):
+        outputs = ShardedSteganography.encode(self.carriers, self.message, self.output_dir, workers=2)
+        self.assertGreater(len(outputs), 1)
+        decoded_message = ShardedSteganography.decode(list(reversed(outputs)), workers=2)
+        self.assertEqual(self.message, decoded_message)
+
+    def test_jpeg_carriers_are_written_losslessly(self):
+        jpeg_carriers = [f"tests/shard_carrier_{i}.jpg" for i in range(2)]
+        for carrier in jpeg_carriers:
+            Image.open(self.test_image).convert('RGB').save(carrier)
+        self.carriers += jpeg_carriers
+
+        message = "J" * ImageSteganography.capacity(jpeg_carriers[0])  # Needs both carriers
+        outputs = ShardedSteganography.encode(jpeg_carriers, message, self.output_dir)
+        self.assertEqual(2, len(outputs))
+        self.assertTrue(all(path.endswith('.png') for path in outputs))
+        self.assertEqual(message, ShardedSteganography.decode(outputs))
+
+    def test_unsupported_carriers_are_skipped(self):
+        # A grayscale image has no capacity, so planning leaves it out
+        gray_carrier = "tests/shard_carrier_gray.png"
+        Image.open(self.test_image).convert('L').save(gray_carrier)
+        self.carriers.insert(0, gray_carrier)  # Ties keep pool order, so it would be planned first
+        outputs = ShardedSteganography.encode(self.carriers, self.message, self.output_dir)
+        self.assertNotIn(os.path.join(self.output_dir, "shard_carrier_gray.png"), outputs)
+        self.assertEqual(self.message, ShardedSteganography.decode(outputs))
+
+    def test_failed_shard_removes_written_outputs(self):
+        # A truncated carrier passes planning but fails to encode
+        with open(self.test_image, 'rb') as fh:
+            data = fh.read()
+        with open(self.carriers[0], 'wb') as fh:
+            fh.write(data[:len(data) // 2])
+        with self.assertRaises(Exception):
+            ShardedSteganography.encode(self.carriers, self.message, self.output_dir, workers=2)
+        self.assertEqual([], os.listdir(self.output_dir))
+
+        shutil.copy(self.test_image, self.carriers[0])
+        outputs = ShardedSteganography.encode(self.carriers, self.message, self.output_dir, workers=2)
+        self.assertEqual(self.message, ShardedSteganography.decode(outputs))
+
+    def test_missing_shard(self):
+        outputs = ShardedSteganography.encode(self.carriers, self.message, self.output_dir)
+        with self.assertRaises(ValueError):
+            ShardedSteganography.decode(outputs[1:])
+
+    def test_message_too_large(self):
+        with self.assertRaises(ValueError):
+            ShardedSteganography.encode(self.carriers[:1], self.message, self.output_dir)
+
+    def tearDown(self):
+        for carrier in self.carriers:
+            if os.path.exists(carrier):
+                os.remove(carrier)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
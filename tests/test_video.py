@@ -32,6 +32,20 @@ class TestVideoSteganography(unittest.TestCase):
         decoded_message = VideoSteganography.decode(self.encoded_video)
         self.assertEqual(self.message, decoded_message)
 
+    def test_non_latin1_message(self):
+        with self.assertRaises(ValueError):
+            VideoSteganography.encode(self.test_video, "日本", self.encoded_video)
+        key = "0123456789abcdef"
+        VideoSteganography.encode(self.test_video, "日本", self.encoded_video, key)
+        self.assertEqual("日本", VideoSteganography.decode(self.encoded_video, key))
+
+    def test_scatter_encode_decode(self):
+        # Keyed scatter order must round-trip with the same key
+        key = "0123456789abcdef"
+        VideoSteganography.encode(self.test_video, self.message, self.encoded_video, key, scatter=True)
+        decoded_message = VideoSteganography.decode(self.encoded_video, key, scatter=True)
+        self.assertEqual(self.message, decoded_message)
+
     def tearDown(self):
         if os.path.exists(self.encoded_video):
             os.remove(self.encoded_video)
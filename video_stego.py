@@ -7,6 +7,41 @@ from Crypto.Hash import SHA256
 import base64
 import tempfile
 import shutil
+from scatter import KeyedScatter
+import carrier_cache
+
+class _CachedCapture:
+    """Minimal cv2.VideoCapture stand-in that replays frames from the carrier cache."""
+
+    def __init__(self, meta: dict, frames: np.ndarray):
+        self.meta = meta
+        self.frames = frames
+        self.index = 0
+        self.opened = True
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def read(self) -> tuple:
+        if not self.opened or self.index >= len(self.frames):
+            return False, None
+        frame = np.array(self.frames[self.index])  # Callers modify frames in place
+        self.index += 1
+        return True, frame
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.meta['frame_count']  # The container's figure, as cv2 reports it
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.frames.shape[1]
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.frames.shape[2]
+        if prop == cv2.CAP_PROP_FPS:
+            return self.meta['fps']
+        return 0
+
+    def release(self) -> None:
+        self.opened = False
 
 class VideoSteganography:
     @staticmethod
@@ -38,6 +73,55 @@ class VideoSteganography:
         except Exception as e:
             raise ValueError(f"Decryption failed: {str(e)}")
 
+    @staticmethod
+    def _open_capture(video_path: str):
+        """Opens a video for reading, through the carrier cache when it is enabled.
+
+        A cache miss decodes every frame once, straight into the array the
+        cache allocates for it (a spill file for videos over its budget);
+        later opens replay them. A video the cache cannot hold is read from
+        the file as usual, without decoding ahead.
+        """
+        cache = carrier_cache.active()
+        if cache is None or not os.path.exists(video_path):
+            return cv2.VideoCapture(video_path)  # Callers report a capture that won't open
+
+        hit = cache.get(video_path, 'video')
+        if hit is not None:
+            return _CachedCapture(*hit)
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return cap
+        meta = {'fps': cap.get(cv2.CAP_PROP_FPS),
+                'frame_count': cap.get(cv2.CAP_PROP_FRAME_COUNT)}
+        shape = (int(meta['frame_count']), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                 int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        frames = cache.allocate(video_path, 'video', shape) if shape[0] > 0 else None
+        if frames is None:
+            return cap
+
+        try:
+            n_read = 0
+            while n_read < len(frames):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames[n_read] = frame
+                n_read += 1
+            complete = n_read == len(frames) and not cap.grab()
+        except Exception:
+            cache.discard(frames)
+            raise
+        finally:
+            cap.release()
+        if not complete:
+            # The container's frame count was off; don't cache a partial decode
+            cache.discard(frames)
+            return cv2.VideoCapture(video_path)
+        cache.put(video_path, 'video', meta, frames)
+        return _CachedCapture(meta, frames)
+
     @staticmethod
     def _get_video_capacity(cap) -> int:
         """Calculate maximum storable bits in video"""
@@ -47,8 +131,24 @@ class VideoSteganography:
         return frame_count * height * width * 3  # 3 channels per pixel
 
     @staticmethod
-    def encode(video_path: str, message: str, output_path: str, key: str = None, append: bool = False) -> None:
-        """Encode message with cross-device safe file operations"""
+    def capacity(video_path: str) -> int:
+        """Maximum message length in characters."""
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open input video: {video_path}")
+        try:
+            return (VideoSteganography._get_video_capacity(cap) - 64) // 8  # Length header
+        finally:
+            cap.release()
+
+    @staticmethod
+    def encode(video_path: str, message: str, output_path: str, key: str = None, append: bool = False,
+               scatter: bool = False) -> None:
+        """Encode message with cross-device safe file operations
+
+        With scatter, bits are spread over the whole video in an order derived
+        from the key, and every frame is rewritten.
+        """
         output_path = os.path.splitext(output_path)[0] + '.avi'
         temp_path = None
         temp_dir = os.path.dirname(output_path) or '.'  # Use output directory for temp files
@@ -60,7 +160,7 @@ class VideoSteganography:
             existing_message = ""
             if append and os.path.exists(output_path):
                 try:
-                    existing_message = VideoSteganography.decode(output_path, key)
+                    existing_message = VideoSteganography.decode(output_path, key, scatter)
                 except Exception as e:
                     print(f"Warning: Could not read existing message - {str(e)}")
 
@@ -71,9 +171,8 @@ class VideoSteganography:
             if key:
                 combined_message = VideoSteganography.encrypt_message(key, combined_message)
 
-            # Convert to binary with header
-            binary_msg = ''.join(f"{ord(c):08b}" for c in combined_message)
-            full_msg = f"{len(binary_msg):064b}" + binary_msg
+            # Convert to bits with a 64-bit length header
+            full_msg = VideoSteganography._message_bits(combined_message)
 
             # Handle input source for append mode
             input_source = video_path
@@ -81,7 +180,7 @@ class VideoSteganography:
                 input_source = output_path
 
             # Open input video
-            cap = cv2.VideoCapture(input_source)
+            cap = VideoSteganography._open_capture(input_source)
             if not cap.isOpened():
                 raise ValueError(f"Could not open input video: {input_source}")
 
@@ -91,6 +190,7 @@ class VideoSteganography:
                 cap.release()
                 raise ValueError(f"Message too large ({len(full_msg)}/{capacity} bits)")
 
+
             # Create temporary file in the same directory as output
             temp_fd, temp_path = tempfile.mkstemp(suffix='.avi', dir=temp_dir)
             os.close(temp_fd)  # Close the file descriptor as VideoWriter will open the file
@@ -102,18 +202,16 @@ class VideoSteganography:
 
             # Embed message bits
             bit_idx = 0
-            while cap.isOpened() and bit_idx < len(full_msg):
+            if scatter:
+                # The scatter header replaces the plain one
+                bit_idx = VideoSteganography._scatter_write(cap, out, KeyedScatter(key, capacity), full_msg[64:])
+            while cap.isOpened() and not scatter and bit_idx < len(full_msg):
                 ret, frame = cap.read()
                 if not ret:
                     break
 
                 # Embed in LSB of all color channels
-                for row in frame:
-                    for pixel in row:
-                        for channel in range(3):
-                            if bit_idx < len(full_msg):
-                                pixel[channel] = (pixel[channel] & 0xFE) | int(full_msg[bit_idx])
-                                bit_idx += 1
+                bit_idx += VideoSteganography._embed_bits(frame, full_msg[bit_idx:])
                 out.write(frame)
 
             # Final checks
@@ -142,36 +240,40 @@ class VideoSteganography:
                 out.release()
 
     @staticmethod
-    def decode(video_path: str, key: str = None) -> str:
+    def decode(video_path: str, key: str = None, scatter: bool = False) -> str:
         """Decode message with proper error handling"""
-        cap = cv2.VideoCapture(video_path)
+        cap = VideoSteganography._open_capture(video_path)
         if not cap.isOpened():
             raise ValueError("Could not open video file")
 
-        bits = []
         try:
-            # Extract all LSB bits
+            if scatter:
+                order = KeyedScatter(key, VideoSteganography._get_video_capacity(cap))
+                message = VideoSteganography._scatter_read(cap, order).decode('latin-1')
+                return VideoSteganography.decrypt_message(key, message)
+
+            # Read the length header, then only as many frames as the message needs
+            chunks = []
+            n_bits = 0
+            msg_length = None
             while cap.isOpened():
+                if msg_length is not None and n_bits >= 64 + msg_length:
+                    break
                 ret, frame = cap.read()
                 if not ret:
                     break
-
-                for row in frame:
-                    for pixel in row:
-                        for channel in range(3):
-                            bits.append(str(pixel[channel] & 1))
+                chunks.append(frame.reshape(-1) & 1)
+                n_bits += chunks[-1].size
+                if msg_length is None and n_bits >= 64:
+                    header = np.concatenate(chunks)[:64]
+                    msg_length = int.from_bytes(np.packbits(header).tobytes(), 'big')
 
             # Process extracted bits
-            if len(bits) < 64:
-                return ""
-
-            msg_length = int(''.join(bits[:64]), 2)
-            if len(bits) < 64 + msg_length:
+            if msg_length is None or n_bits < 64 + msg_length:
                 return ""
 
-            message_bits = bits[64:64+msg_length]
-            message = ''.join([chr(int(''.join(message_bits[i:i+8]), 2)) 
-                             for i in range(0, len(message_bits), 8)])
+            bits = np.concatenate(chunks)
+            message = VideoSteganography._extract_message(bits[64:64 + msg_length])
 
             # Decrypt if needed
             if key:
@@ -183,3 +285,96 @@ class VideoSteganography:
             raise ValueError(f"Decoding failed: {str(e)}")
         finally:
             cap.release()
+
+    @staticmethod
+    def _peek_bits(video_path: str, n_bits: int) -> np.ndarray:
+        """LSBs of the first n_bits channel values, reading only the frames needed."""
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError("Could not open video file")
+        chunks = []
+        n_read = 0
+        try:
+            while n_read < n_bits:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                chunks.append(frame.reshape(-1)[:n_bits - n_read] & 1)
+                n_read += chunks[-1].size
+        finally:
+            cap.release()
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint8)
+
+    @staticmethod
+    def _message_bits(message: str) -> np.ndarray:
+        """64-bit message length header followed by the message bits, one byte per character."""
+        try:
+            body = np.unpackbits(np.frombuffer(message.encode('latin-1'), dtype=np.uint8))
+        except UnicodeEncodeError:
+            raise ValueError("Message has characters outside Latin-1; use a key to embed any text.") from None
+        header = np.unpackbits(np.array([len(body)], dtype='>u8').view(np.uint8))
+        return np.concatenate((header, body))
+
+    @staticmethod
+    def _embed_bits(frame: np.ndarray, bits: np.ndarray) -> int:
+        """Writes leading bits into a frame's channel LSBs in place; returns the count used."""
+        flat = frame.reshape(-1)
+        count = min(len(bits), flat.size)
+        flat[:count] = (flat[:count] & 0xFE) | bits[:count]
+        return count
+
+    @staticmethod
+    def _scatter_write(cap, out, order: KeyedScatter, bits: np.ndarray) -> int:
+        """Copies every frame from cap to out, writing scattered bits into the frames they land in.
+
+        Positions arrive in increasing order, so frames are visited once, in
+        order. Returns the bits written, header included.
+        """
+        written = 0
+        frame, frame_start, frame_end = None, 0, 0
+        for positions, values in order.placements(bits):
+            while len(positions):
+                while positions[0] >= frame_end:
+                    if frame is not None:
+                        out.write(frame)
+                    ret, frame = cap.read()
+                    if not ret:
+                        return written
+                    frame_start, frame_end = frame_end, frame_end + frame.size
+                cut = np.searchsorted(positions, frame_end)
+                flat = frame.reshape(-1)
+                offsets = positions[:cut] - frame_start
+                flat[offsets] = (flat[offsets] & 0xFE) | values[:cut]
+                written += cut
+                positions, values = positions[cut:], values[cut:]
+
+        while frame is not None:
+            out.write(frame)
+            ret, frame = cap.read()
+        return written
+
+    @staticmethod
+    def _scatter_read(cap, order: KeyedScatter) -> bytes:
+        """Reads a scattered payload in one pass over the frames, stopping after its last bit."""
+        frame, frame_start, frame_end = None, 0, 0
+
+        def read_bits(positions: np.ndarray) -> np.ndarray:
+            nonlocal frame, frame_start, frame_end
+            bits = np.empty(len(positions), dtype=np.uint8)
+            lo = 0
+            while lo < len(positions):
+                while positions[lo] >= frame_end:
+                    ret, frame = cap.read()
+                    if not ret:
+                        raise ValueError("Video ended before all scattered bits were read")
+                    frame_start, frame_end = frame_end, frame_end + frame.size
+                hi = np.searchsorted(positions, frame_end)
+                bits[lo:hi] = frame.reshape(-1)[positions[lo:hi] - frame_start] & 1
+                lo = hi
+            return bits
+
+        return order.read_message(read_bits)
+
+    @staticmethod
+    def _extract_message(bits: np.ndarray) -> str:
+        return np.packbits(bits[:len(bits) - len(bits) % 8]).tobytes().decode('latin-1')